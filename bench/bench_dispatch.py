@@ -0,0 +1,72 @@
+"""
+Compare the dispatch cost of the old traversal, where node.visit calls
+visitor.visit_* and misses go through __getattr__, with the dispatch
+table of uwu_visitor.Visitor.
+
+    python bench/bench_dispatch.py [nodes]
+"""
+import common
+
+import sys
+import timeit
+
+from uwu_parser import PLNumber
+from uwu_visitor import Visitor
+
+class OldNumber:
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def visit(self, visitor):
+        return visitor.visit_number(self)
+
+class OldMissing:
+    def visit(self, visitor):
+        return visitor.visit_missing(self)
+
+class OldCounter:
+    def visit_number(self, n):
+        return 1
+
+    def __getattr__(self, name):
+        if name.startswith('visit_'):
+            def f(t):
+                return 0
+            return f
+        raise super().__getattribute__(name)
+
+    def walk(self, nodes):
+        return sum(x.visit(self) for x in nodes)
+
+class Missing:
+    pass
+
+class NewCounter(Visitor):
+    def visit_number(self, n):
+        return 1
+
+    def unknown_node(self, node):
+        return 0
+
+    def walk(self, nodes):
+        dispatch = self.dispatch
+        return sum(dispatch(x) for x in nodes)
+
+def main(n: int) -> None:
+    old_hits = [OldNumber(1.0) for _ in range(n)]
+    new_hits = [PLNumber(value = 1.0, token = None) for _ in range(n)]
+    old_misses = [OldMissing() for _ in range(n)]
+    new_misses = [Missing() for _ in range(n)]
+
+    old, new = OldCounter(), NewCounter()
+    rows = [
+        ('hit', lambda: old.walk(old_hits), lambda: new.walk(new_hits)),
+        ('miss', lambda: old.walk(old_misses), lambda: new.walk(new_misses)),
+    ]
+    for name, f_old, f_new in rows:
+        t_old = min(timeit.repeat(f_old, number = 5, repeat = 5)) / (5 * n)
+        t_new = min(timeit.repeat(f_new, number = 5, repeat = 5)) / (5 * n)
+        print(f'{name:<5} old {t_old * 1e9:7.1f} ns/node  new {t_new * 1e9:7.1f} ns/node  ({t_old / t_new:.2f}x)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,57 @@
+"""
+Compare the runtime of the output of PythonCompiler, where variables
+are module globals, against FastLocalsPythonCompiler, where they are
+locals of a function.
+
+    python bench/bench_fast_locals.py [lines]
+"""
+import common
+
+import contextlib
+import gc
+import io
+import sys
+import time
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_stream
+from uwu_python_compiler import PythonCompiler, FastLocalsPythonCompiler
+from workload import generate
+
+def run(code) -> tuple:
+    out = io.StringIO()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            exec(code, {'__name__': '__main__'})
+        return time.perf_counter() - start, out.getvalue()
+    finally:
+        gc.enable()
+
+def main(lines: int, repeat: int = 9) -> None:
+    # Mostly SUMs over a few variables, the closest UWU has to a hot loop.
+    script = generate(lines, mix = (1, 20, 1), variables = 32)
+
+    codes = []
+    for compiler_cls in (PythonCompiler, FastLocalsPythonCompiler):
+        source = io.StringIO()
+        compile_stream(Tokenizer.from_string(script, engine = 'bulk'), compiler_cls, source)
+        codes.append(compile(source.getvalue(), '<uwu>', 'exec'))
+
+    # Alternate between both programs so they run under the same conditions.
+    times = [[], []]
+    outputs = [None, None]
+    for _ in range(repeat):
+        for i, code in enumerate(codes):
+            t, outputs[i] = run(code)
+            times[i].append(t)
+
+    assert outputs[0] == outputs[1]
+    globals_time, locals_time = min(times[0]), min(times[1])
+    print(f'lines: {lines}')
+    print(f'globals: {globals_time:.3f}s')
+    print(f'locals:  {locals_time:.3f}s ({globals_time / locals_time:.2f}x)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
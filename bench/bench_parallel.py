@@ -0,0 +1,44 @@
+"""
+Time the serial front end against parse_file with growing numbers of
+processes on one generated file, checking the trees are equal.
+
+    python bench/bench_parallel.py [lines]
+"""
+import common
+
+import os
+import sys
+import tempfile
+import time
+
+from tokenizer import BulkTokenizer
+from uwu_source import read_chunks
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_parallel import parse_file
+from workload import generate
+
+def main(lines: int) -> None:
+    fd, path = tempfile.mkstemp(suffix = '.uwu')
+    with os.fdopen(fd, 'w', encoding = 'utf-8') as f:
+        f.write(generate(lines))
+    try:
+        start = time.perf_counter()
+        tokenizer = BulkTokenizer(read_chunks(path), source_name = os.path.basename(path), source_path = path)
+        expected = Pass(Parser(tokenizer).parse(), consume = True).do_pass()
+        serial = time.perf_counter() - start
+        print(f'{"serial":<8} {serial:8.3f} s')
+
+        jobs = 2
+        while jobs <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            tree = parse_file(path, jobs, min_chunk_size = 1)
+            seconds = time.perf_counter() - start
+            assert tree == expected
+            print(f'{f"-j {jobs}":<8} {seconds:8.3f} s {serial / seconds:6.2f}x')
+            jobs *= 2
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
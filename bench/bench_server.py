@@ -0,0 +1,116 @@
+"""
+Load test of the compile server: several clients send small generated
+programs at once, and the throughput and latency percentiles are
+printed, next to the time of running main.py once per program.
+
+    python bench/bench_server.py --clients 16 --requests 4000
+    python bench/bench_server.py --address :8765 --repeat 0.5
+
+Without --address a server is started on a temporary Unix socket with
+-j workers.
+"""
+import common
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from uwu_server import AsyncClient
+from workload import generate
+
+MAIN = os.path.join(common.CURR_DIR, '..', 'main.py')
+
+def percentile(xs: list, p: float) -> float:
+    return xs[min(len(xs) - 1, int(len(xs) * p))]
+
+async def load(address: str, programs: list, clients: int, target: str) -> list:
+    latencies = []
+    queue = list(reversed(programs))
+
+    async def client():
+        c = await AsyncClient.connect(address)
+        try:
+            while queue:
+                source = queue.pop()
+                start = time.perf_counter()
+                await c.compile(source, target)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            await c.close()
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+def wait_for_socket(path: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("Server did not start.")
+        time.sleep(0.05)
+
+def spawn(programs: list, target: str) -> float:
+    """
+    Seconds per program of compiling it with a new main.py process.
+    """
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'a.uwu')
+        start = time.perf_counter()
+        for source in programs:
+            with open(path, 'w', encoding = 'utf-8') as f:
+                f.write(source)
+            flag = '--c' if target == 'c' else '--python'
+            subprocess.run([sys.executable, MAIN, flag, '--no-cache', '-j', '1', path], check = True)
+        return (time.perf_counter() - start) / len(programs)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = 'Load test of the UWU compile server.')
+    parser.add_argument('--address', help = 'server to test, one is started when not given')
+    parser.add_argument('-j', '--jobs', type = int, default = os.cpu_count() or 1, help = 'workers of the started server')
+    parser.add_argument('--clients', type = int, default = 8)
+    parser.add_argument('--requests', type = int, default = 2000)
+    parser.add_argument('--lines', type = int, default = 20, help = 'lines of every program')
+    parser.add_argument('--repeat', type = float, default = 0.0, help = 'share of requests repeating an earlier program')
+    parser.add_argument('--target', choices = ('python', 'c'), default = 'python')
+    parser.add_argument('--spawn', type = int, default = 20, help = 'programs to compile with main.py for comparison, 0 to skip')
+    args = parser.parse_args()
+
+    r = random.Random(0)
+    programs = []
+    for i in range(args.requests):
+        if programs and r.random() < args.repeat:
+            programs.append(r.choice(programs))
+        else:
+            programs.append(generate(args.lines, seed = i))
+
+    server = None
+    d = tempfile.TemporaryDirectory()
+    address = args.address
+    if address is None:
+        address = os.path.join(d.name, 'uwu.sock')
+        server = subprocess.Popen([sys.executable, MAIN, '--serve', address, '-j', str(args.jobs)], stderr = subprocess.DEVNULL)
+    try:
+        if server is not None:
+            wait_for_socket(address, server)
+        start = time.perf_counter()
+        latencies = asyncio.run(load(address, programs, args.clients, args.target))
+        seconds = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        d.cleanup()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests, {args.clients} clients: {len(latencies) / seconds:,.0f} requests/s")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    if args.spawn:
+        per = spawn(programs[:args.spawn], args.target)
+        print(f"main.py per program: {per * 1000:.1f} ms, {1 / per:,.0f} programs/s")
+
+if __name__ == '__main__':
+    main()
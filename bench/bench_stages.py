@@ -0,0 +1,131 @@
+"""
+Time every compiler stage on a generated program and write the results
+as JSON, so runs can be compared.
+
+    python bench/bench_stages.py --lines 100000 -o before.json
+    python bench/bench_stages.py --lines 100000 -o after.json --compare before.json
+"""
+import common
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_python_compiler import PythonCompiler
+from uwu_c_compiler import CCompiler
+from uwu_ast_compiler import AstCompiler
+from workload import generate, NUMBER_FORMATS
+
+class Replay:
+    """
+    Tokenizer stand-in returning already built tokens, so the parser is
+    timed on its own.
+    """
+    def __init__(self, tokens: list) -> None:
+        self.tokens = tokens
+        self.i = 0
+
+    def next(self):
+        t = self.tokens[self.i]
+        if self.i < len(self.tokens) - 1:
+            self.i += 1
+        return t
+
+def stages(script: str):
+    """
+    Yield (name, setup, run) for every stage. setup builds the input of
+    the stage from the output of the previous ones and is not timed.
+    """
+    tokens = list(Tokenizer.from_string(script, engine = 'bulk'))
+    yield 'tokenize-char', lambda: script, lambda s: list(Tokenizer.from_string(s, engine = 'char'))
+    yield 'tokenize-bulk', lambda: script, lambda s: list(Tokenizer.from_string(s, engine = 'bulk'))
+    yield 'tokenize-offset', lambda: script, lambda s: list(Tokenizer.from_string(s, engine = 'offset'))
+    yield 'parse', lambda: Replay(tokens), lambda r: Parser(r).parse()
+    yield 'pass', lambda: Parser(Replay(tokens)).parse(), lambda tree: Pass(tree).do_pass()
+    lowered = Pass(Parser(Replay(tokens)).parse()).do_pass()
+    for name, compiler_cls in (('emit-python', PythonCompiler), ('emit-c', CCompiler)):
+        yield name, lambda: lowered, lambda t, cls = compiler_cls: cls(t, io.StringIO()).compile()
+    yield 'emit-ast', lambda: lowered, lambda t: AstCompiler(t, None).compile()
+
+def measure(setup, run, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    arg = setup()
+    tracemalloc.start()
+    run(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = 'Stage level benchmark of the UWU compiler.')
+    parser.add_argument('--lines', type = int, default = 100_000)
+    parser.add_argument('--ident-len', type = int, default = 8)
+    parser.add_argument('--mix', default = '1,6,2', help = 'weights of declarations, SUMs and prints')
+    parser.add_argument('--formats', default = 'int,decimal', help = 'number formats: ' + ', '.join(NUMBER_FORMATS))
+    parser.add_argument('--symbols', action = 'store_true', help = 'use @ ! ~ in identifiers')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--repeat', type = int, default = 3)
+    parser.add_argument('--only', help = 'comma separated stages to run')
+    parser.add_argument('-o', '--output', help = 'write the results to this JSON file')
+    parser.add_argument('--compare', help = 'JSON file of a previous run to compare against')
+    args = parser.parse_args()
+
+    workload = {
+        'lines': args.lines,
+        'ident_len': args.ident_len,
+        'mix': [int(x) for x in args.mix.split(',')],
+        'formats': args.formats.split(','),
+        'symbols': args.symbols,
+        'seed': args.seed,
+    }
+    script = generate(
+        args.lines, ident_len = args.ident_len, mix = tuple(workload['mix']),
+        formats = tuple(workload['formats']), symbols = args.symbols, seed = args.seed,
+    )
+    only = set(args.only.split(',')) if args.only else None
+
+    results = {}
+    for name, setup, run in stages(script):
+        if only is not None and name not in only:
+            continue
+        r = measure(setup, run, args.repeat)
+        r['lines_per_s'] = args.lines / r['seconds']
+        results[name] = r
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['stages']
+
+    for name, r in results.items():
+        line = f"{name:<16} {r['seconds']:8.3f} s {r['lines_per_s']:12,.0f} lines/s {r['peak_bytes'] / 2 ** 20:9.1f} MiB"
+        if previous is not None and name in previous:
+            line += f"  {r['lines_per_s'] / previous[name]['lines_per_s']:5.2f}x"
+        print(line)
+
+    if args.output:
+        report = {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'workload': workload,
+            'stages': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Measure the import time of main.py with python -X importtime, for one
+small compile per backend, and fail when it regresses.
+
+    python bench/bench_startup.py -o startup.json
+    python bench/bench_startup.py --baseline startup.json --threshold 1.25
+    python bench/bench_startup.py --max-ms 80
+
+Besides the times, every run checks that modules of the backends and
+modes it does not use are not imported. Exits with status 1 on any
+regression.
+"""
+import common
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+MAIN = os.path.join(common.CURR_DIR, '..', 'main.py')
+
+# Flags of every scenario, and modules it must not import.
+SCENARIOS = {
+    'python': (['--python'], ['uwu_c_compiler', 'uwu_ast_compiler']),
+    'c': (['--c'], ['uwu_python_compiler', 'uwu_ast_compiler']),
+    'pyc': (['--pyc'], ['uwu_c_compiler']),
+}
+NEVER = [
+    'uwu_vm', 'uwu_cbuild', 'uwu_server', 'uwu_watch', 'uwu_parallel', 'uwu_incremental',
+    'asyncio', 'concurrent.futures', 'multiprocessing', 'subprocess', 'cProfile',
+]
+
+def import_times(stderr: str) -> dict:
+    """
+    Cumulative microseconds of every module in -X importtime output.
+    Top level imports are keyed by name, nested ones too.
+    """
+    t = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        t[name.strip()] = (int(cumulative), len(name) - len(name.lstrip()) == 1)
+    return t
+
+def measure(flags: list, path: str, repeat: int) -> tuple:
+    """
+    Best total import time in ms over repeat runs, and the modules
+    imported by that run.
+    """
+    best = None
+    for _ in range(repeat):
+        p = subprocess.run(
+            [sys.executable, '-X', 'importtime', MAIN, *flags, '--no-cache', '-j', '1', path],
+            capture_output = True, text = True
+        )
+        if p.returncode != 0:
+            raise RuntimeError(f"main.py failed.\n{p.stderr}")
+        times = import_times(p.stderr)
+        total = sum(us for us, top in times.values() if top) / 1000
+        if best is None or total < best[0]:
+            best = total, times
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = 'Startup time benchmark of main.py.')
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--only', help = 'comma separated scenarios to run: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--top', type = int, default = 5, help = 'slowest top level imports to list')
+    parser.add_argument('--max-ms', type = float, help = 'fail when a scenario imports for longer')
+    parser.add_argument('--baseline', help = 'JSON file of a previous run to compare against')
+    parser.add_argument('--threshold', type = float, default = 1.25, help = 'fail when slower than the baseline by this factor')
+    parser.add_argument('-o', '--output', help = 'write the results to this JSON file')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['scenarios']
+    only = set(args.only.split(',')) if args.only else None
+
+    failures = []
+    results = {}
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'a.uwu')
+        with open(path, 'w') as f:
+            f.write("O.O @_@\n:v @_@ 2\nUwU @_@\n")
+        for name, (flags, forbidden) in SCENARIOS.items():
+            if only is not None and name not in only:
+                continue
+            ms, times = measure(flags, path, args.repeat)
+            results[name] = {'ms': ms}
+
+            line = f"{name:<8} {ms:8.1f} ms"
+            if baseline is not None and name in baseline:
+                ratio = ms / baseline[name]['ms']
+                line += f"  {ratio:5.2f}x"
+                if ratio > args.threshold:
+                    failures.append(f"{name}: {ratio:.2f}x the baseline, over {args.threshold}x.")
+            print(line)
+            top = sorted(((us, x) for x, (us, is_top) in times.items() if is_top), reverse = True)
+            for us, x in top[:args.top]:
+                print(f"    {x:<24} {us / 1000:8.1f} ms")
+
+            if args.max_ms is not None and ms > args.max_ms:
+                failures.append(f"{name}: {ms:.1f} ms, over {args.max_ms} ms.")
+            for x in forbidden + NEVER:
+                if x in times:
+                    failures.append(f"{name}: imports {x}.")
+
+    if args.output:
+        report = {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'scenarios': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 2)
+
+    for x in failures:
+        print(x, file = sys.stderr)
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare running a program on the VM against running the output of
+PythonCompiler.
+
+    python bench/bench_vm.py [lines]
+"""
+import common
+
+import contextlib
+import io
+import sys
+import time
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_stream
+from uwu_python_compiler import PythonCompiler
+from uwu_vm import load, run
+
+def make_program(lines: int, variables: int = 16) -> str:
+    t = [f'O.O v{i}' for i in range(variables)]
+    for i in range(lines - variables):
+        v = i % variables
+        if i % 4 == 3:
+            t.append(f'UwU v{v}')
+        elif i % 4 == 2:
+            t.append(f':v v{v} v{(v + 1) % variables}')
+        else:
+            t.append(f':v v{v} {i % 7}')
+    return '\n'.join(t) + '\n'
+
+def timed(f):
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+def main(lines: int) -> None:
+    script = make_program(lines)
+
+    source = io.StringIO()
+    build_py = timed(lambda: compile_stream(Tokenizer.from_string(script, engine = 'bulk'), PythonCompiler, source))
+    py_out = io.StringIO()
+    def run_py():
+        code = compile(source.getvalue(), '<uwu>', 'exec')
+        with contextlib.redirect_stdout(py_out):
+            exec(code, {})
+    run_py_time = timed(run_py)
+
+    programs = []
+    build_vm = timed(lambda: programs.append(load(Tokenizer.from_string(script, engine = 'bulk'))))
+    vm_out = io.StringIO()
+    run_vm_time = timed(lambda: run(programs[0], vm_out))
+
+    assert py_out.getvalue() == vm_out.getvalue()
+    print(f'lines: {lines}')
+    print(f'python: emit {build_py:.3f}s, compile+exec {run_py_time:.3f}s, total {build_py + run_py_time:.3f}s')
+    print(f'vm:     load {build_vm:.3f}s, run {run_vm_time:.3f}s, total {build_vm + run_vm_time:.3f}s')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
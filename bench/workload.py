@@ -0,0 +1,57 @@
+"""
+Generator of large, valid UWU programs for benchmarks.
+"""
+import random
+
+NUMBER_FORMATS = {
+    'int': lambda r: str(r.randint(0, 999)),
+    'underscore': lambda r: '{:_}'.format(r.randint(1_000, 9_999_999)),
+    'decimal': lambda r: f'{r.randint(0, 999)}.{r.randint(0, 99)}',
+    'decimal_underscore': lambda r: '{:_}.{}_{}'.format(r.randint(1_000, 999_999), r.randint(0, 9), r.randint(0, 9)),
+}
+
+IDENT_START = 'abcdefghijklmnopqrstuvwxyz'
+IDENT_REST = IDENT_START + '0123456789_'
+IDENT_SYMBOLS = '@!~'
+
+def make_identifier(r: random.Random, length: int, symbols: bool) -> str:
+    rest = IDENT_REST + IDENT_SYMBOLS if symbols else IDENT_REST
+    return r.choice(IDENT_START) + ''.join(r.choice(rest) for _ in range(length - 1))
+
+def generate(
+    lines: int,
+    ident_len: int = 8,
+    mix: tuple = (1, 6, 2),
+    formats: tuple = ('int', 'decimal'),
+    symbols: bool = False,
+    variables: int = 256,
+    seed: int = 0,
+) -> str:
+    """
+    Build a program of lines statements. mix weights declarations, SUMs
+    and prints; SUMs and prints only use variables declared before them.
+    At most variables distinct identifiers are declared.
+    """
+    r = random.Random(seed)
+    decl_w, sum_w, print_w = mix
+    number_formats = [NUMBER_FORMATS[x] for x in formats]
+
+    names = []
+    seen = set()
+    t = []
+    for _ in range(lines):
+        kind = r.choices(('decl', 'sum', 'print'), weights = (decl_w, sum_w, print_w))[0]
+        if not names or (kind == 'decl' and len(names) < variables):
+            name = make_identifier(r, ident_len, symbols)
+            while name in seen:
+                name = make_identifier(r, ident_len, symbols)
+            seen.add(name)
+            names.append(name)
+            t.append(f'O.O {name}')
+        elif kind == 'print':
+            t.append('UwU ' + ' '.join(r.choice(names) for _ in range(r.randint(1, 3))))
+        elif r.random() < 0.2:
+            t.append(f':v {r.choice(names)} {r.choice(names)}')
+        else:
+            t.append(f':v {r.choice(names)} {r.choice(number_formats)(r)}')
+    return '\n'.join(t) + '\n'
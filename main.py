@@ -1,13 +1,26 @@
 
 import argparse
+import glob
+import io
 import os
 import sys
 
-from tokenizer import Tokenizer
+from functools import partial
+
+from tokenizer import ENGINES, get_engine
+from uwu_source import read_chunks
+from uwu_pipeline import compile_stream, compile_tree, compile_lowered
+from uwu_optimize import Optimizer
+from uwu_cache import CompileCache
+from uwu_backends import BACKENDS, CC_OPT_LEVELS, DEFAULT_CC_OPT, get_backend
 from uwu_parser import Parser
 from uwu_pass import Pass
-from uwu_c_compiler import CCompiler
-from uwu_python_compiler import PythonCompiler
+from uwu_instrument import Timings, NULL_TIMINGS
+
+# Backends, and the modules only some modes need (the VM, the C builder,
+# parallel parsing, --watch, --serve), are imported where they are used
+# so every run only pays for what it uses. bench/bench_startup.py checks
+# this stays so.
 
 parser = argparse.ArgumentParser(
     prog = 'UWUc',
@@ -15,41 +28,350 @@ parser = argparse.ArgumentParser(
     epilog = 'UWU your world.'
 )
 
-parser.add_argument('file')
+parser.add_argument('files', nargs='*', metavar='file', help='files, directories or glob patterns')
 group = parser.add_mutually_exclusive_group()
 group.add_argument('--c', action='store_true')
 group.add_argument('--python', action='store_true')
+group.add_argument('--pyc', action='store_true', help='write a .pyc built from a Python ast')
+group.add_argument('--target', choices=sorted(BACKENDS), help='backend to compile with, --c, --python and --pyc are short for it')
+parser.add_argument('--run', action='store_true', help='run the program on the VM instead of writing a file, or natively with --c')
+parser.add_argument('--build', action='store_true', help='with --c, build a native executable next to the file')
+parser.add_argument('--cc-opt', choices=CC_OPT_LEVELS, default=DEFAULT_CC_OPT, help='C compiler optimization level for --build and --c --run')
+parser.add_argument('--fast-locals', action='store_true', help='with --python, wrap the program in a function so variables are locals')
+parser.add_argument('--tokenizer', choices=sorted(ENGINES), default='bulk')
+parser.add_argument('--mmap', action='store_true', help='read the source through mmap')
+parser.add_argument('--tree', action='store_true', help='build the whole tree before emitting')
+parser.add_argument('--no-cache', action='store_true', help='always compile, without reading or filling the cache')
+parser.add_argument('--clear-cache', action='store_true', help='remove every cached output')
+parser.add_argument('--cache-dir', help='cache location, defaults to $UWU_CACHE_DIR or ~/.cache/uwu')
+parser.add_argument('-O', dest='opt', type=int, choices=sorted(Optimizer.LEVELS), default=0, help='optimization level, -O0 to -O2')
+parser.add_argument('--opt-report', action='store_true', help='print the time and statement count of every optimization pass')
+parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+parser.add_argument('--timings', action='store_true', help='print the time of every stage, token and node counts and peak memory')
+parser.add_argument('--parse-jobs', type=int, default=1, metavar='N', help='parse every file in N processes, building the whole tree; files are compiled one at a time')
+parser.add_argument('--watch', action='store_true', help='stay running and recompile files as they change')
+parser.add_argument('--watch-interval', type=float, default=0.25, metavar='SECONDS', help='how often --watch looks for changes')
+parser.add_argument('--serve', metavar='ADDRESS', help='serve compile requests on a Unix socket path or on HOST:PORT, using -j worker processes')
+parser.add_argument('--profile', metavar='FILE', help='write a cProfile stats file, compiling in a single process')
 
 def err(msg):
     print(msg, file=sys.stderr)
     exit(-1)
 
-def comp(path, compiler_cls):
+def open_tokenizer(path, engine = 'bulk', use_mmap = False):
     filename = os.path.basename(path)
+    tokenizer_cls = get_engine(engine)
+    chunks = read_chunks(path, use_mmap = use_mmap)
+    return tokenizer_cls(tokenizer_cls.wrap_chunks(chunks), source_path = path, source_name = filename)
+
+def run(path, engine = 'bulk', use_mmap = False, opt = 0, timings = NULL_TIMINGS, parse_jobs = 1):
+    """
+    Run path on the VM. Returns the optimizer report, if any.
+    """
+    from uwu_vm import BytecodeCompiler, load, run as run_program
+    with timings:
+        if not opt and parse_jobs <= 1:
+            program = load(open_tokenizer(path, engine, use_mmap), timings)
+            with timings.stage('vm'):
+                run_program(program)
+            return None
+        optimizer = Optimizer(opt) if opt else None
+        if parse_jobs > 1:
+            t = parse_parallel(path, parse_jobs, engine, use_mmap, timings)
+        else:
+            parser = Parser(timings.tokenizer(open_tokenizer(path, engine, use_mmap)))
+            with timings.stage('parser'):
+                tree = parser.parse()
+            timings.count_tree(tree)
+            with timings.stage('pass'):
+                t = Pass(tree, consume = True).do_pass()
+        if optimizer is not None:
+            with timings.stage('optimizer'):
+                t = optimizer.optimize(t)
+        with timings.stage('backend'):
+            program = BytecodeCompiler(t).compile()
+        with timings.stage('vm'):
+            run_program(program)
+    return optimizer.format_report() if optimizer is not None else None
+
+def native(path, engine = 'bulk', use_mmap = False, opt = 0, timings = NULL_TIMINGS, builder = None, stream = True, run = True, parse_jobs = 1):
+    """
+    Compile path to C and build it with builder, an uncached CBuilder by
+    default. The executable is run when run is set, and written next to
+    path otherwise. Returns the optimizer report, if any.
+    """
+    if builder is None:
+        from uwu_cbuild import CBuilder
+        builder = CBuilder()
+    c_compiler = get_backend('c')
+    optimizer = Optimizer(opt) if opt else None
+    compiler_cls = partial(c_compiler, line_file = path)
+    o = io.StringIO()
+    with timings:
+        if parse_jobs > 1:
+            t = parse_parallel(path, parse_jobs, engine, use_mmap, timings)
+            compile_lowered(t, compiler_cls, o, optimizer, timings)
+        elif stream and optimizer is None:
+            compile_stream(open_tokenizer(path, engine, use_mmap), compiler_cls, o, timings)
+        else:
+            compile_tree(open_tokenizer(path, engine, use_mmap), compiler_cls, o, optimizer, timings)
+
+        if run:
+            sys.stdout.flush()
+            with timings.stage('native'):
+                status = builder.run(o.getvalue())
+            if status != 0:
+                raise RuntimeError(f"Program exited with status {status}.")
+        else:
+            target, _ = os.path.splitext(path)
+            if target == path:
+                target += '.out'
+            with timings.stage('cc'):
+                builder.build(o.getvalue(), target)
+    return optimizer.format_report() if optimizer is not None else None
+
+def parse_parallel(path, parse_jobs, engine, use_mmap, timings):
+    from uwu_parallel import parse_file
+    return parse_file(path, parse_jobs, engine, use_mmap = use_mmap, timings = timings)
+
+def comp(path, compiler_cls, engine = 'bulk', use_mmap = False, stream = True, cache = None, opt = 0, timings = NULL_TIMINGS, parse_jobs = 1):
+    """
+    Compile path next to it. Returns the optimizer report, if any.
+    """
+    with timings:
+        return _comp(path, compiler_cls, engine, use_mmap, stream, cache, opt, timings, parse_jobs)
+
+def _comp(path, compiler_cls, engine, use_mmap, stream, cache, opt, timings, parse_jobs):
     no_ext, _ = os.path.splitext(path)
     target = no_ext + compiler_cls.EXT
 
-    with open(target, 'w', encoding='utf-8') as o:
-        with open(path, 'r', encoding='utf-8') as f:
-            tknzr = Tokenizer(iter(f.read()), source_path = path, source_name = filename)
-            parser = Parser(tknzr)
-            tree_1 = parser.parse()
-            pass_1 = Pass(tree_1)
-            t = pass_1.do_pass()
-            compiler = compiler_cls(t, o)
-            compiler.compile()
+    options = [f'O{opt}']
+    if getattr(compiler_cls, 'NAMES_SOURCE', False):
+        # The output holds the path, two copies of a file differ.
+        options.append(os.path.abspath(path))
+    if cache is not None:
+        with timings.stage('cache'):
+            key = cache.key(path, compiler_cls, *options)
+            hit = cache.fetch(key, target)
+        if hit:
+            # No stage but the cache ran, say so in the reports.
+            timings.count('cache hits')
+            return "output served from the cache, no passes ran" if opt else None
 
-def main(args):
-    path = args.file
+    optimizer = Optimizer(opt) if opt else None
+    binary = getattr(compiler_cls, 'BINARY', False)
+    if getattr(compiler_cls, 'NAMES_SOURCE', False):
+        compiler_cls = partial(compiler_cls, filename = path)
+
+    if binary:
+        o = open(target, 'wb')
+    else:
+        o = open(target, 'w', encoding='utf-8')
+    try:
+        with o:
+            if parse_jobs > 1:
+                t = parse_parallel(path, parse_jobs, engine, use_mmap, timings)
+                compile_lowered(t, compiler_cls, o, optimizer, timings)
+            elif stream and optimizer is None:
+                compile_stream(open_tokenizer(path, engine, use_mmap), compiler_cls, o, timings)
+            else:
+                compile_tree(open_tokenizer(path, engine, use_mmap), compiler_cls, o, optimizer, timings)
+    except BaseException:
+        # Do not leave a half written output behind.
+        os.remove(target)
+        raise
+
+    if cache is not None:
+        with timings.stage('cache'):
+            cache.store(key, target)
+    return optimizer.format_report() if optimizer is not None else None
+
+def expand_paths(paths):
+    """
+    Expand directories to the .uwu files under them and glob patterns
+    to their matches, sorted so the order does not depend on the file
+    system. Paths that match nothing are kept so they can be reported.
+    A file given more than once is only kept the first time, so two
+    workers never write the same output.
+    """
+    t = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            found = sorted(glob.glob(os.path.join(glob.escape(path), '**', '*.uwu'), recursive=True))
+        elif not os.path.exists(path) and glob.has_magic(path):
+            found = sorted(glob.glob(path, recursive=True)) or [path]
+        else:
+            found = [path]
+        for x in found:
+            key = os.path.normpath(x)
+            if key not in seen:
+                seen.add(key)
+                t.append(x)
+    return t
+
+def comp_file(path, compiler_cls, timings = False, **options):
+    """
+    Compile path, returning an (error, report, timings) triple instead
+    of raising. timings is a Timings when asked for, None otherwise.
+    """
     if not os.path.isfile(path):
-        err(f"UWUc: '{path}' does not exist.")
-    
+        return f"UWUc: '{path}' does not exist.", None, None
+    t = Timings() if timings else None
+    try:
+        report = comp(path, compiler_cls, timings = t or NULL_TIMINGS, **options)
+    except Exception as e:
+        return describe_error(path, e), None, t
+    return None, report, t
+
+def describe_error(path, e):
+    return f"UWUc: '{path}': {type(e).__name__}: {e}"
+
+def comp_many(paths, compiler_cls, jobs = 1, **options):
+    """
+    Compile every path, in a process pool when jobs > 1. Returns
+    (path, error, report, timings) tuples in the order of paths.
+    """
+    f = partial(comp_file, compiler_cls = compiler_cls, **options)
+    if jobs <= 1 or len(paths) <= 1:
+        return [(path, *f(path)) for path in paths]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers = min(jobs, len(paths))) as executor:
+        return [(path, *x) for path, x in zip(paths, executor.map(f, paths, chunksize = 8))]
+
+def main(args):
+    cache = None if args.no_cache else CompileCache(args.cache_dir)
+    if args.clear_cache:
+        CompileCache(args.cache_dir).clear()
+        if not args.files:
+            return
+
+    if args.serve:
+        serve(args)
+        return
+
+    if not args.files:
+        err("UWUc: no file given.")
+    paths = expand_paths(args.files)
+    if not paths:
+        err("UWUc: no .uwu files found.")
     if args.c:
-        comp(path, CCompiler)
+        args.target = 'c'
+    elif args.pyc:
+        args.target = 'pyc'
+    elif args.python:
+        args.target = 'python'
+    if args.run and args.target not in (None, 'c'):
+        err("UWUc: --run runs on the VM, or natively with --c.")
+    if args.build and args.target != 'c':
+        err("UWUc: --build needs --c.")
+    if args.fast_locals and (args.target not in (None, 'python') or args.run):
+        err("UWUc: --fast-locals only applies to --python.")
+
+    if args.parse_jobs < 1:
+        err("UWUc: --parse-jobs must be at least 1.")
+    if args.watch and (args.run or args.build):
+        err("UWUc: --watch only writes outputs, it cannot --run or --build.")
+
+    if args.watch:
+        watch(args, cache)
+        return
+
+    if args.profile:
+        from uwu_instrument import profile
+        with profile(args.profile):
+            compile_paths(args, paths, cache, jobs = 1)
+    elif args.parse_jobs > 1:
+        compile_paths(args, paths, cache, jobs = 1)
     else:
-        comp(path, PythonCompiler)
-        
+        compile_paths(args, paths, cache, args.jobs)
+
+def backend(args):
+    if args.fast_locals:
+        return get_backend('python-fast-locals')
+    return get_backend(args.target or 'python')
+
+def serve(args):
+    import asyncio
+    from uwu_server import CompileServer
+    server = CompileServer(args.jobs)
+    print(f"UWUc: serving on {args.serve}, press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.serve))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        err(f"UWUc: cannot serve on {args.serve}. {e}")
+
+def watch(args, cache):
+    """
+    Compile args.files, then keep recompiling the ones that change until
+    interrupted.
+    """
+    from uwu_watch import Watcher
+    compiler_cls = backend(args)
+    def full(path):
+        error, report, _ = comp_file(
+            path, compiler_cls,
+            engine = args.tokenizer, use_mmap = args.mmap, stream = not args.tree, cache = cache, opt = args.opt,
+            parse_jobs = args.parse_jobs
+        )
+        if args.opt_report and report:
+            print(f"{path}:\n{report}", file=sys.stderr)
+        return error
+    watcher = Watcher(
+        partial(expand_paths, args.files), compiler_cls, full,
+        engine = args.tokenizer, incremental = not args.opt and not args.tree and args.parse_jobs <= 1,
+        describe = describe_error
+    )
+    print(f"UWUc: watching {len(watcher.sources())} files, press Ctrl+C to stop.", file=sys.stderr)
+    watcher.run(args.watch_interval)
+
+def compile_paths(args, paths, cache, jobs):
+    if args.run or args.build:
+        if args.target == 'c':
+            from uwu_cbuild import CBuilder
+            try:
+                builder = CBuilder(cache, opt = args.cc_opt)
+            except RuntimeError as e:
+                err(f"UWUc: {e}")
+            f = partial(native, builder = builder, stream = not args.tree, run = args.run, parse_jobs = args.parse_jobs)
+        else:
+            f = partial(run, parse_jobs = args.parse_jobs)
+        for path in paths:
+            if not os.path.isfile(path):
+                err(f"UWUc: '{path}' does not exist.")
+            timings = Timings() if args.timings else NULL_TIMINGS
+            try:
+                report = f(path, args.tokenizer, args.mmap, args.opt, timings)
+            except Exception as e:
+                err(f"UWUc: '{path}': {type(e).__name__}: {e}")
+            if args.opt_report and report:
+                print(f"{path}:\n{report}", file=sys.stderr)
+            if args.timings:
+                print(f"{path}:\n{timings.format_report()}", file=sys.stderr)
+        return
+
+    compiler_cls = backend(args)
+    results = comp_many(
+        paths, compiler_cls, jobs,
+        engine = args.tokenizer, use_mmap = args.mmap, stream = not args.tree, cache = cache, opt = args.opt,
+        timings = args.timings, parse_jobs = args.parse_jobs
+    )
+    if args.opt_report:
+        for path, _, report, _ in results:
+            if report:
+                print(f"{path}:\n{report}", file=sys.stderr)
+    if args.timings:
+        for path, _, _, timings in results:
+            if timings is not None:
+                print(f"{path}:\n{timings.format_report()}", file=sys.stderr)
+    errors = [e for _, e, _, _ in results if e is not None]
+    for e in errors:
+        print(e, file=sys.stderr)
+    if errors:
+        err(f"UWUc: {len(errors)} of {len(results)} files failed.")
 
 
 if __name__ == '__main__':
-    main(parser.parse_args())
+    main(parser.parse_intermixed_args())
@@ -0,0 +1,31 @@
+import common
+
+import ast
+import contextlib
+import io
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_ast_compiler import AstCompiler
+from uwu_python_compiler import PythonCompiler
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@
+"""
+
+t = Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass()
+compiler = AstCompiler(t, None)
+compiler.compile()
+print(ast.unparse(compiler.module()))
+
+source = io.StringIO()
+PythonCompiler(t, source).compile()
+assert ast.dump(compiler.module()) == ast.dump(ast.parse(source.getvalue()))
+
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    exec(compiler.code(), {})
+print(out.getvalue())
@@ -0,0 +1,27 @@
+import common
+
+import sys
+
+from uwu_backends import BACKENDS, get_backend, register
+
+assert set(BACKENDS) == {'python', 'python-fast-locals', 'c', 'pyc'}
+
+# Backends are only imported when asked for.
+assert 'uwu_c_compiler' not in sys.modules
+c = get_backend('c')
+assert c.__name__ == 'CCompiler' and c.EXT == '.c'
+assert 'uwu_c_compiler' in sys.modules
+assert get_backend('python-fast-locals').__name__ == 'FastLocalsPythonCompiler'
+assert get_backend('pyc').BINARY
+
+try:
+    get_backend('cobol')
+except ValueError as e:
+    assert 'cobol' in str(e)
+else:
+    assert False
+
+register('python-copy', 'uwu_python_compiler', 'PythonCompiler')
+assert get_backend('python-copy') is get_backend('python')
+del BACKENDS['python-copy']
+print('Backends OK')
@@ -0,0 +1,17 @@
+import common
+from tokenizer import Tokenizer
+
+script = """
+O.O @_@
+
+UwU @_@
+:v @_@ 2
+UwU @_@
+:v @_@ 1_000.2_5
+UwU @_@"""
+
+char_tokens = list(Tokenizer.from_string(script, engine = 'char'))
+bulk_tokens = list(Tokenizer.from_string(script, engine = 'bulk'))
+for t in bulk_tokens:
+    print(t)
+assert char_tokens == bulk_tokens
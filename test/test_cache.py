@@ -0,0 +1,46 @@
+import common
+
+import os
+import tempfile
+
+import uwu_cache
+from uwu_cache import CompileCache
+from uwu_c_compiler import CCompiler
+from uwu_ast_compiler import AstCompiler
+from uwu_python_compiler import PythonCompiler
+
+root = tempfile.mkdtemp()
+cache = CompileCache(os.path.join(root, 'cache'), max_bytes = 64)
+
+source = os.path.join(root, 'a.uwu')
+with open(source, 'w') as f:
+    f.write("O.O @_@\nUwU @_@\n")
+output = os.path.join(root, 'a.out')
+
+py_key = cache.key(source, PythonCompiler)
+c_key = cache.key(source, CCompiler)
+assert py_key != c_key
+# Outputs of another compiler version are not served.
+uwu_cache.VERSION += '+1'
+assert cache.key(source, PythonCompiler) != py_key
+uwu_cache.VERSION = uwu_cache.VERSION[:-2]
+assert cache.key(source, PythonCompiler) == py_key
+# Nor .pyc files of another Python version.
+pyc_key = cache.key(source, AstCompiler)
+AstCompiler.CACHE_KEY, magic = '00000000', AstCompiler.CACHE_KEY
+assert cache.key(source, AstCompiler) != pyc_key
+AstCompiler.CACHE_KEY = magic
+assert not cache.fetch(py_key, output)
+
+with open(output, 'w') as f:
+    f.write('x' * 40)
+cache.store(py_key, output)
+assert cache.fetch(py_key, output)
+
+# A second entry goes over max_bytes and evicts the older one.
+os.utime(cache.entry_path(py_key), (0, 0))
+cache.store(c_key, output)
+assert not cache.fetch(py_key, output) and cache.fetch(c_key, output)
+
+cache.clear()
+assert not cache.fetch(c_key, output)
@@ -0,0 +1,124 @@
+import common
+
+import contextlib
+import io
+import os
+import subprocess
+import tempfile
+
+from functools import partial
+
+from tokenizer import Tokenizer
+from uwu_cache import CompileCache
+from uwu_cbuild import CBuilder
+from uwu_c_compiler import CCompiler
+from uwu_python_compiler import PythonCompiler
+from uwu_pipeline import compile_stream
+from uwu_vm import load, run
+from uwu_mangle import C_RESERVED
+
+def to_c(script, line_file):
+    o = io.StringIO()
+    compile_stream(Tokenizer.from_string(script), partial(CCompiler, line_file = line_file), o)
+    return o.getvalue()
+
+root = tempfile.mkdtemp()
+cache = CompileCache(os.path.join(root, 'cache'))
+builder = CBuilder(cache, opt = '1')
+
+c_source = to_c("O.O @_@\n:v @_@ 2\nUwU @_@ @_@\n", 'a.uwu')
+assert '#line 2 "a.uwu"' in c_source
+target = os.path.join(root, 'a')
+builder.build(c_source, target)
+assert subprocess.check_output([target]) == b'2 2\n'
+assert cache.lookup(builder.key(c_source)) is not None
+assert builder.run(c_source) == 0
+
+# A program C rejects is reported against the UWU source.
+try:
+    builder.build(to_c("O.O a\nO.O a\n", 'b.uwu'), os.path.join(root, 'b'))
+    assert False
+except RuntimeError as e:
+    assert 'b.uwu:2' in str(e), str(e)
+    print(e)
+
+# Native programs print the same numbers as the Python backend and the
+# VM, decimals and values beyond a C int included.
+script = """
+O.O a
+:v a 0.5
+:v a 1.5
+UwU a
+O.O b
+:v b 1234567.5
+UwU b
+O.O c
+:v c 0.1
+:v c 0.2
+UwU c a b
+O.O d
+:v d 0.00001
+UwU d
+:v d 10_000_000_000_000_000
+UwU d
+:v d 0.125
+UwU d
+O.O e
+:v e 2_000_000_000
+:v e 2_000_000_000
+UwU e
+:v e 0.5
+UwU e
+O.O f
+:v f 1e-300
+UwU f
+"""
+script = script.replace('1e-300', '0.' + '0' * 299 + '1')
+
+python_source = io.StringIO()
+compile_stream(Tokenizer.from_string(script), PythonCompiler, python_source)
+python_out = io.StringIO()
+with contextlib.redirect_stdout(python_out):
+    exec(python_source.getvalue(), {})
+vm_out = io.StringIO()
+run(load(Tokenizer.from_string(script)), vm_out)
+
+target = os.path.join(root, 'numbers')
+builder.build(to_c(script, 'numbers.uwu'), target)
+native_out = subprocess.check_output([target], text = True)
+assert native_out == python_out.getvalue() == vm_out.getvalue(), (native_out, python_out.getvalue())
+print(native_out)
+
+# Variables named like the helpers and macros of the generated program
+# are renamed, so it still builds and prints the same.
+names = ['uwu_repr', 'NULL', 'EOF', 'DBL_DIG', 'stdout', 'linux']
+script = ''.join(f"O.O {x}\n:v {x} 1\n" for x in names) + ":v uwu_repr 0.5\nUwU " + ' '.join(names) + "\n"
+python_source = io.StringIO()
+compile_stream(Tokenizer.from_string(script), PythonCompiler, python_source)
+python_out = io.StringIO()
+with contextlib.redirect_stdout(python_out):
+    exec(python_source.getvalue(), {})
+target = os.path.join(root, 'names')
+builder.build(to_c(script, 'names.uwu'), target)
+assert subprocess.check_output([target], text = True) == python_out.getvalue() == "1.5 1 1 1 1 1\n"
+
+# Every object-like macro of the included headers is reserved.
+includes = ''.join(x + '\n' for x in to_c("", 'x.uwu').splitlines() if x.startswith('#include'))
+macros = subprocess.run([builder.cc, '-dM', '-E', '-'], input = includes, capture_output = True, text = True, check = True).stdout
+for line in macros.splitlines():
+    name = line.split()[1]
+    if '(' not in name and not name.startswith('_'):
+        assert name in C_RESERVED, name
+
+# Literals past any double build and print as infinity.
+big = '9' * 400
+script = f"O.O a\n:v a {big}\n:v a {big}\nO.O b\n:v b 1{big}.5\nUwU a b {big}\n"
+target = os.path.join(root, 'big')
+builder.build(to_c(script, 'big.uwu'), target)
+assert subprocess.check_output([target], text = True) == "inf inf inf\n"
+python_source = io.StringIO()
+compile_stream(Tokenizer.from_string(script), PythonCompiler, python_source)
+python_out = io.StringIO()
+with contextlib.redirect_stdout(python_out):
+    exec(python_source.getvalue(), {})
+assert python_out.getvalue() == f"{2 * int(big)} inf {big}\n"
@@ -0,0 +1,35 @@
+import common
+
+import io
+import os
+
+from tokenizer import Tokenizer
+from uwu_emitter import Emitter
+from uwu_pipeline import compile_stream
+from uwu_c_compiler import CCompiler
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@
+"""
+
+calls = []
+e = Emitter(calls.append, flush_threshold = 8)
+e.writeln('ñandú')
+print(calls)
+e.writeln('uwu')
+e.flush()
+print(calls, e.bytes_emitted)
+assert e.bytes_emitted == len(''.join(calls).encode('utf-8'))
+
+r, w = os.pipe()
+compiler = compile_stream(Tokenizer.from_string(script), CCompiler, w)
+os.close(w)
+with os.fdopen(r, 'r') as f:
+    from_fd = f.read()
+
+buf = io.StringIO()
+compile_stream(Tokenizer.from_string(script), CCompiler, buf)
+assert buf.getvalue() == from_fd
+print(compiler.o.bytes_emitted, len(from_fd))
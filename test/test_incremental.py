@@ -0,0 +1,75 @@
+import common
+
+import io
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_tree
+from uwu_incremental import IncrementalCompiler
+from uwu_c_compiler import CCompiler
+from uwu_python_compiler import PythonCompiler
+from uwu_exception import UWUError
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@
+"""
+
+def full(compiler_cls, source):
+    o = io.StringIO()
+    compile_tree(Tokenizer.from_string(source), compiler_cls, o)
+    return o.getvalue()
+
+for compiler_cls in (PythonCompiler, CCompiler):
+    inc = IncrementalCompiler(compiler_cls, script)
+    assert inc.output() == full(compiler_cls, script)
+
+    inc.edit(2, 3, ':v @_@ 3\n:v @_@ 4')
+    assert inc.output() == full(compiler_cls, inc.source)
+
+    try:
+        inc.edit(1, 2, 'O.O uwu')
+        assert False
+    except UWUError as e:
+        print(e)
+
+    inc.edit(1, 1, 'O.O @_@')
+    assert inc.output() == full(compiler_cls, inc.source)
+    print(inc.output())
+
+# Declaring a.b first moves a_dot_b to a suffixed name.
+inc = IncrementalCompiler(PythonCompiler, 'O.O a_dot_b\n:v a_dot_b 1\nO.O a.b\nUwU a.b a_dot_b\n')
+inc.edit(0, 0, 'O.O a.b')
+assert inc.output() == full(PythonCompiler, inc.source)
+print(inc.output())
+
+# Adding a double earlier moves the widening of a to another line.
+inc = IncrementalCompiler(CCompiler, 'O.O a\n:v a 1\n:v a 0.5\nUwU a\n')
+assert inc.output() == full(CCompiler, inc.source)
+inc.edit(1, 2, ':v a 0.25')
+assert inc.output() == full(CCompiler, inc.source)
+inc.edit(1, 2, ':v a 3_000_000_000')
+assert inc.output() == full(CCompiler, inc.source)
+print(inc.output())
+
+def full_error(compiler_cls, source):
+    try:
+        full(compiler_cls, source)
+    except UWUError as e:
+        return str(e)
+    assert False
+
+# Errors point at the same lines as a full compile, after edits moved
+# the lines around too.
+inc = IncrementalCompiler(PythonCompiler, 'O.O a\n:v a 1\nUwU a\nUwU a\n')
+inc.edit(1, 1, 'O.O b\nO.O c')
+inc.edit(0, 1, 'O.O a\n:v a 2')
+for edit in ((5, 6, 'UwU a zz'), (0, 1, 'O.O q\nO.O r'), (3, 4, '  :v  q 1')):
+    try:
+        inc.edit(*edit)
+        assert False
+    except UWUError as e:
+        assert str(e) == full_error(PythonCompiler, inc.source), (str(e), full_error(PythonCompiler, inc.source))
+        print(e)
+    inc.edit(0, len(inc.lines), 'O.O a\n:v a 1\nO.O b\nO.O c\nUwU a\nUwU a\n')
+    inc.output()
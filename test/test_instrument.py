@@ -0,0 +1,24 @@
+import common
+
+import io
+
+from tokenizer import Tokenizer
+from uwu_instrument import Timings
+from uwu_pipeline import compile_stream, compile_tree
+from uwu_python_compiler import PythonCompiler
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@ 3
+"""
+
+for compile_f in (compile_stream, compile_tree):
+    timings = Timings()
+    with timings:
+        compile_f(Tokenizer.from_string(script), PythonCompiler, io.StringIO(), timings = timings)
+    assert timings.counts == {'tokens': 12, 'statements': 3, 'nodes': 11}, timings.counts
+    assert {'tokenizer', 'parser', 'pass', 'backend'} <= set(timings.seconds)
+    assert sum(timings.seconds.values()) <= timings.total
+    assert timings.peak_bytes > 0
+    print(timings.format_report())
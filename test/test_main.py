@@ -0,0 +1,79 @@
+import common
+
+import marshal
+import os
+import tempfile
+
+from main import expand_paths, comp_file, comp_many
+from uwu_cache import CompileCache
+from uwu_python_compiler import PythonCompiler
+from uwu_ast_compiler import AstCompiler
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, 'w', encoding = 'utf-8') as f:
+        f.write(text)
+
+with tempfile.TemporaryDirectory() as d:
+    def p(*parts):
+        return os.path.join(d, *parts)
+
+    write(p('src', 'b.uwu'), "O.O b\nUwU b\n")
+    write(p('src', 'a.uwu'), "O.O a\n:v a 1\nUwU a\n")
+    write(p('src', 'sub', 'c.uwu'), "O.O c\nUwU c\n")
+    write(p('src', 'notes.txt'), "not uwu\n")
+    write(p('bad.uwu'), "UwU z\n")
+    write(p('ok.uwu'), "O.O ok\n")
+
+    # Directories give their .uwu files sorted, globs their matches,
+    # and a file given again is kept where it first came.
+    assert expand_paths([p('src')]) == [p('src', 'a.uwu'), p('src', 'b.uwu'), p('src', 'sub', 'c.uwu')]
+    assert expand_paths([p('*.uwu')]) == [p('bad.uwu'), p('ok.uwu')]
+    assert expand_paths([p('src', 'b.uwu'), p('src'), p('src', '.', 'a.uwu')]) == [p('src', 'b.uwu'), p('src', 'a.uwu'), p('src', 'sub', 'c.uwu')]
+    # Patterns matching nothing and missing files are kept to be reported.
+    assert expand_paths([p('*.nope'), p('gone.uwu')]) == [p('*.nope'), p('gone.uwu')]
+
+    # A symlink loop where the output goes makes open fail. That error
+    # is reported and the link, which the compile did not write, stays.
+    os.symlink(p('loop.py'), p('loop.py'))
+    write(p('loop.uwu'), "O.O x\n")
+
+    paths = expand_paths([p('src'), p('bad.uwu'), p('gone.uwu'), p('loop.uwu'), p('ok.uwu')])
+    for jobs in (1, 3):
+        results = comp_many(paths, PythonCompiler, jobs)
+        assert [path for path, _, _, _ in results] == paths
+        errors = {os.path.basename(path): e for path, e, _, _ in results if e is not None}
+        assert set(errors) == {'bad.uwu', 'gone.uwu', 'loop.uwu'}, errors
+        assert 'Undeclared variables' in errors['bad.uwu']
+        assert 'does not exist' in errors['gone.uwu']
+        assert 'OSError' in errors['loop.uwu'] and 'symbolic links' in errors['loop.uwu'], errors['loop.uwu']
+        assert os.path.islink(p('loop.py'))
+        # The files that compiled are written, failed ones leave nothing.
+        for x in ('src/a.py', 'src/b.py', 'src/sub/c.py', 'ok.py'):
+            assert os.path.isfile(p(*x.split('/'))), x
+            os.remove(p(*x.split('/')))
+        assert not os.path.exists(p('bad.py'))
+        print(f"-j {jobs}: {len(paths) - len(errors)} of {len(paths)} files compiled")
+
+# Files served from the cache still report, and say where they came from.
+with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, 'a.uwu')
+    write(path, "O.O a\n:v a 1\nUwU a\n")
+    cache = CompileCache(os.path.join(d, 'cache'))
+    error, report, timings = comp_file(path, PythonCompiler, timings = True, cache = cache, opt = 2)
+    assert error is None and 'constant-folding' in report and 'cache hits' not in timings.counts
+    error, report, timings = comp_file(path, PythonCompiler, timings = True, cache = cache, opt = 2)
+    assert error is None and 'served from the cache' in report
+    assert timings.counts['cache hits'] == 1 and 'cache' in timings.seconds
+    assert 'cache hits' in timings.format_report()
+    print(timings.format_report())
+
+# A .pyc names the file it came from, cached or not.
+with tempfile.TemporaryDirectory() as d:
+    cache = CompileCache(os.path.join(d, 'cache'))
+    for name in ('a', 'b'):
+        path = os.path.join(d, name, 'x.uwu')
+        write(path, "O.O a\nUwU a\n")
+        assert comp_file(path, AstCompiler, cache = cache)[0] is None
+        with open(os.path.join(d, name, 'x.pyc'), 'rb') as f:
+            assert marshal.loads(f.read()[16:]).co_filename == path
@@ -0,0 +1,31 @@
+import common
+
+import io
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_stream
+from uwu_python_compiler import PythonCompiler, FastLocalsPythonCompiler
+from uwu_mangle import Mangler, C_RESERVED, PYTHON_RESERVED
+
+m = Mangler(C_RESERVED)
+assert m.mangle('@_@') == '_at___at_'
+assert m.mangle('a.b') == 'a_dot_b'
+assert m.mangle('a_dot_b') == 'a_dot_b_1'
+assert m.mangle('a_dot_b_1') == 'a_dot_b_1_1'
+assert m.mangle('int') == 'int_1'
+assert m.mangle('printf') == 'printf_1'
+assert m.mangle('a.b') == 'a_dot_b'
+assert m.unmangle('a_dot_b_1') == 'a_dot_b'
+print(m.mapping())
+
+m = Mangler(PYTHON_RESERVED)
+assert m.mangle('print') == 'print_1'
+assert m.mangle('if') == 'if_1'
+assert m.mangle('int') == 'int'
+assert m.mangle('__debug__') == '__debug___1'
+
+# Names Python cannot assign to still give a program that compiles.
+for compiler_cls in (PythonCompiler, FastLocalsPythonCompiler):
+    o = io.StringIO()
+    compile_stream(Tokenizer.from_string("O.O __debug__\n:v __debug__ 1\nO.O True\nUwU __debug__ True\n"), compiler_cls, o)
+    compile(o.getvalue(), '<test>', 'exec')
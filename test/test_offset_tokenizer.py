@@ -0,0 +1,42 @@
+import common
+from tokenizer import Tokenizer, BulkTokenizer, OffsetTokenizer, OffsetToken
+from uwu_exception import UWUError
+
+FIELDS = ('line', 'col', 'n', 'span', 'source_name', 'source_path', 'type', 'value')
+
+def fields(t):
+    return tuple(getattr(t, x) for x in FIELDS)
+
+script = "O.O ñandú\n\n  UwU ñandú\n:v ñandú 2\n:v ñandú 1_000.2_5\nUwU ñandú"
+
+bulk_tokens = list(Tokenizer.from_string(script, engine = 'bulk'))
+offset_tokens = list(Tokenizer.from_string(script, engine = 'offset'))
+assert all(type(t) is OffsetToken for t in offset_tokens)
+assert [fields(t) for t in offset_tokens] == [fields(t) for t in bulk_tokens]
+print(offset_tokens[4], offset_tokens[4].line, offset_tokens[4].col)
+
+# Split in chunks, starting on line 10 of a bigger file.
+chunks = [script[i:i + 4] for i in range(0, len(script), 4)]
+shifted = list(OffsetTokenizer(iter(chunks), line = 10, offset = 100))
+expected = list(BulkTokenizer(iter(chunks), line = 10, offset = 100))
+assert [fields(t) for t in shifted] == [fields(t) for t in expected]
+
+def error(engine, s):
+    try:
+        list(Tokenizer.from_string(s, engine = engine))
+    except Exception as e:
+        return str(e)
+    raise AssertionError("Expected an error.")
+
+for bad in ("O.O a\n  $", "O.O a\n:v a 1.\n", "O.O a\n\n:v a 1.x"):
+    assert error('offset', bad) == error('char', bad)
+    print(error('offset', bad))
+
+# Literals past the digits int converts fail at the literal, for every engine.
+big = "O.O a\n:v a " + '9' * 5000 + "\n"
+for engine in ('char', 'bulk', 'offset'):
+    try:
+        list(Tokenizer.from_string(big, engine = engine))
+        assert False, engine
+    except UWUError as e:
+        assert str(e) == "in <string> at char 12 [1:6] Number literal has too many digits.", str(e)
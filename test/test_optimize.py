@@ -0,0 +1,61 @@
+import common
+
+import contextlib
+import io
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_optimize import Optimizer
+from uwu_python_compiler import PythonCompiler
+from uwu_exception import UWUError
+
+script = """
+O.O a
+O.O b
+O.O unused
+:v a 1
+:v a 2
+:v a 3.5
+:v b a
+:v b 1.5
+:v unused 3
+UwU a
+:v a 0.25
+UwU b a
+"""
+
+def run(level):
+    optimizer = Optimizer(level)
+    t = optimizer.optimize(Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass())
+    source = io.StringIO()
+    PythonCompiler(t, source).compile()
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        exec(source.getvalue(), {})
+    return source.getvalue(), out.getvalue(), optimizer
+
+expected = run(0)[1]
+for level in (1, 2):
+    source, out, optimizer = run(level)
+    print(source)
+    print(optimizer.format_report())
+    assert out == expected
+
+# Dead stores reading an undeclared variable still fail like at -O0.
+for source in ("O.O a\n:v a 1\n:v a z\nO.O b\nUwU b\n", "O.O a\n:v a z\nO.O z\nUwU a\n"):
+    for level in (0, 1, 2):
+        t = Optimizer(level).optimize(Pass(Parser(Tokenizer.from_string(source)).parse()).do_pass())
+        try:
+            PythonCompiler(t, io.StringIO()).compile()
+            assert False, level
+        except UWUError as e:
+            assert 'z [' in str(e), str(e)
+
+# A float and an int past any double are left for the program to add.
+big = '9' * 400
+for level in (0, 1, 2):
+    t = Optimizer(level).optimize(Pass(Parser(Tokenizer.from_string(f"O.O a\n:v a 1.5\n:v a {big}\n:v a {big}\nUwU a\n")).parse()).do_pass())
+    source = io.StringIO()
+    PythonCompiler(t, source).compile()
+    assert source.getvalue().count(big) == 2, level
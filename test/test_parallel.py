@@ -0,0 +1,67 @@
+import common
+
+import os
+import tempfile
+
+from tokenizer import get_engine
+from uwu_source import read_chunks
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_parallel import parse_file, split_lines
+
+def serial(path, engine):
+    tokenizer_cls = get_engine(engine)
+    tokenizer = tokenizer_cls(tokenizer_cls.wrap_chunks(read_chunks(path)), source_name = os.path.basename(path), source_path = path)
+    return Pass(Parser(tokenizer).parse(), consume = True).do_pass()
+
+def error(f):
+    try:
+        f()
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+    raise AssertionError("Expected an error.")
+
+def write(script):
+    fd, path = tempfile.mkstemp(suffix = '.uwu')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(script.encode('utf-8'))
+    return path
+
+lines = ["O.O ñandú", ":v ñandú 2_000", "", "\tUwU ñandú", "O.O @_@", ":v @_@ 1.5"]
+script = '\r\n'.join(lines * 40) + '\r\n'
+path = write(script)
+
+ranges = split_lines(path, 8, min_size = 64)
+assert len(ranges) > 2
+with open(path, 'rb') as f:
+    data = f.read()
+assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+
+def positions(tree):
+    t = []
+    for s in tree.children:
+        leaves = s.arguments if hasattr(s, 'arguments') else [s.variable]
+        t.extend((x.token.line, x.token.col) for x in leaves)
+    return t
+
+for engine in ('bulk', 'char', 'offset'):
+    tree = parse_file(path, jobs = 2, engine = engine, min_chunk_size = 64)
+    expected = serial(path, engine)
+    assert tree == expected
+    assert positions(tree) == positions(expected)
+    # Reading through mmap, in the workers and serially.
+    for jobs in (2, 1):
+        mapped = parse_file(path, jobs = jobs, engine = engine, min_chunk_size = 64, use_mmap = True)
+        assert mapped == expected and positions(mapped) == positions(expected)
+    print(engine, len(tree.children), tree.children[-1].arguments[0].token)
+os.remove(path)
+
+# The error the serial front end raises, positions included. A parse
+# error wins over an earlier lowering error.
+for bad in ("O.O a\n" * 30 + "UwU a $\n", ":v\n" + "O.O a\n" * 30 + "O.O 1\n", "O.O 1\n" + "O.O a\n" * 30 + "UwU a $\n"):
+    path = write(bad)
+    expected = error(lambda: serial(path, 'bulk'))
+    assert error(lambda: parse_file(path, jobs = 2, min_chunk_size = 16)) == expected
+    print(expected)
+    os.remove(path)
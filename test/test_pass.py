@@ -15,3 +15,9 @@ print(
     Pass(p.parse()).do_pass()
 )
 
+
+tree = Parser(Tokenizer.from_string(script)).parse()
+copied = Pass(tree).do_pass()
+consumed = Pass(tree, consume = True).do_pass()
+assert consumed is tree
+assert consumed == copied
@@ -0,0 +1,22 @@
+import common
+
+import io
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_stream, compile_tree
+from uwu_c_compiler import CCompiler
+from uwu_python_compiler import PythonCompiler
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@
+"""
+
+for compiler_cls in (PythonCompiler, CCompiler):
+    streamed = io.StringIO()
+    compile_stream(Tokenizer.from_string(script, engine = 'bulk'), compiler_cls, streamed)
+    whole = io.StringIO()
+    compile_tree(Tokenizer.from_string(script), compiler_cls, whole)
+    assert streamed.getvalue() == whole.getvalue()
+    print(streamed.getvalue())
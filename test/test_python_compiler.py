@@ -1,11 +1,12 @@
 import common
 
+import contextlib
 import io
 
 from tokenizer import Tokenizer
 from uwu_parser import Parser
 from uwu_pass import Pass
-from uwu_python_compiler import PythonCompiler
+from uwu_python_compiler import PythonCompiler, FastLocalsPythonCompiler
 
 script = """
 O.O @_@
@@ -21,3 +22,21 @@ output = io.StringIO()
 compiler = PythonCompiler(t, output)
 compiler.compile()
 print(output.getvalue())
+
+fast = io.StringIO()
+FastLocalsPythonCompiler(Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass(), fast).compile()
+print(fast.getvalue())
+
+results = []
+for source in (output.getvalue(), fast.getvalue()):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        exec(source, {'__name__': '__main__'})
+    results.append(out.getvalue())
+assert results[0] == results[1] == '2\n'
+
+# Imported instead of run, the program does nothing.
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    exec(fast.getvalue(), {'__name__': 'uwu'})
+assert out.getvalue() == ''
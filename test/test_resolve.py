@@ -0,0 +1,48 @@
+import common
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_resolve import Resolver, TYPE_INT
+from uwu_exception import UWUError
+
+def lower(script):
+    return Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass()
+
+t = lower("""
+O.O @_@
+O.O uwu
+:v uwu @_@
+O.O @_@
+UwU uwu @_@
+""")
+symbols = Resolver().resolve(t)
+assert symbols.names == ['@_@', 'uwu']
+decl_1, decl_2, sum_1, decl_3, call = t.children
+assert decl_1.variable._who == decl_3.variable._who == 0
+assert [x._who for x in sum_1.arguments] == [1, 0]
+assert [x._who for x in call.arguments] == [1, 0]
+assert all(x._type == TYPE_INT for x in call.arguments)
+assert call.callee._who == -1
+
+t = lower("""
+UwU a
+O.O b
+:v c 1
+:v b d
+""")
+try:
+    Resolver().resolve(t)
+    assert False
+except UWUError as e:
+    assert str(e) == 'Undeclared variables: a [1:4], c [3:3], d [4:5].', str(e)
+    print(e)
+
+resolved = []
+try:
+    for x in Resolver().resolve_stream(lower("O.O b\nUwU b\nUwU a\nUwU b\n").children):
+        resolved.append(x)
+    assert False
+except UWUError as e:
+    assert str(e) == 'Undeclared variables: a [2:4].', str(e)
+assert len(resolved) == 2
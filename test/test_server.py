@@ -0,0 +1,74 @@
+import common
+
+import asyncio
+import os
+import signal
+import tempfile
+
+from uwu_server import CompileServer, Client, AsyncClient, ResultCache, compile_source, parse_address
+from uwu_exception import UWUError
+
+assert parse_address('8765') == ('unix', '8765')
+assert parse_address(':8765') == ('tcp', '127.0.0.1', 8765)
+assert parse_address('localhost:1') == ('tcp', 'localhost', 1)
+assert parse_address('/tmp/uwu:1.sock') == ('unix', '/tmp/uwu:1.sock')
+
+cache = ResultCache(max_bytes = 10)
+cache.put('a', (True, 'x' * 6))
+cache.put('b', (True, 'y' * 6))
+assert cache.get('a') is None and cache.get('b') == (True, 'y' * 6)
+
+script = "O.O @_@\n:v @_@ 2\nUwU @_@\n"
+
+async def main(address):
+    server = CompileServer(jobs = 2)
+    s = await server.start(address)
+    try:
+        client = await AsyncClient.connect(address)
+        outputs = await asyncio.gather(*(client.compile(script, target) for target in ('python', 'c', 'python', 'c')))
+        assert outputs == [compile_source(script, target) for target in ('python', 'c', 'python', 'c')]
+        assert server.requests == 4 and server.hits == 2
+        try:
+            await client.compile("O.O a\nUwU b\n")
+            assert False
+        except UWUError as e:
+            print(e)
+        await client.close()
+
+        # The blocking client, from a thread so the server keeps running.
+        def blocking():
+            with Client(address) as c:
+                return c.compile(script, 'c', opt = 2)
+        output = await asyncio.to_thread(blocking)
+        assert output == compile_source(script, 'c', 2)
+        print(output)
+
+        # A killed worker breaks the pool. Requests sent to it fail and
+        # are not cached, the pool is replaced once and later requests
+        # compile again.
+        client = await AsyncClient.connect(address)
+        broken = server.pool
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        while not broken._broken:
+            await asyncio.sleep(0.01)
+        sources = [f"O.O a\n:v a {i}\nUwU a\n" for i in range(4)]
+        results = await asyncio.gather(*(client.compile(x) for x in sources), return_exceptions = True)
+        failed = [x for x in results if isinstance(x, UWUError)]
+        assert failed and all('Server error' in str(x) for x in failed), results
+        assert server.restarts == 1 and server.pool is not broken
+        pool = server.pool
+        server.replace_pool(broken)
+        assert server.restarts == 1 and server.pool is pool
+        outputs = await asyncio.gather(*(client.compile(x) for x in sources))
+        assert outputs == [compile_source(x, 'python') for x in sources]
+        await client.close()
+    finally:
+        s.close()
+        await s.wait_closed()
+        server.close()
+
+# Workers are started with forkserver, which imports this module again.
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as d:
+        asyncio.run(main(os.path.join(d, 'uwu.sock')))
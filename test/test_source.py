@@ -0,0 +1,26 @@
+import common
+
+import os
+import tempfile
+
+from tokenizer import Tokenizer, BulkTokenizer
+from uwu_source import read_chunks
+
+script = "O.O ñandú\r\n:v ñandú 2\r\n\r\nUwU ñandú\r\n"
+
+fd, path = tempfile.mkstemp(suffix = '.uwu')
+with os.fdopen(fd, 'wb') as f:
+    f.write(script.encode('utf-8'))
+
+with open(path, 'r', encoding = 'utf-8') as f:
+    text = f.read()
+
+expected = list(Tokenizer.from_string(text))
+for use_mmap in (False, True):
+    chunks = list(read_chunks(path, chunk_size = 3, use_mmap = use_mmap))
+    assert ''.join(chunks) == text
+    tokens = list(BulkTokenizer(iter(chunks), source_name = '<string>'))
+    assert tokens == expected
+    print(use_mmap, chunks)
+
+os.remove(path)
@@ -0,0 +1,18 @@
+import common
+from tokenizer import Tokenizer
+from uwu_parser import Parser, StreamParser
+from uwu_token_stream import TokenStream
+
+script = """
+O.O @_@
+:v @_@ 2
+UwU @_@
+"""
+
+stream = TokenStream.from_tokenizer(Tokenizer.from_string(script, engine = 'bulk'))
+print(len(stream), list(stream.kinds), list(stream.offsets))
+assert list(stream) == list(Tokenizer.from_string(script))
+
+tree = StreamParser(stream).parse()
+print(tree)
+assert tree == Parser(Tokenizer.from_string(script)).parse()
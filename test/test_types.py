@@ -0,0 +1,38 @@
+import common
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_resolve import Resolver, TYPE_INT, TYPE_LONG, TYPE_DOUBLE
+from uwu_types import TypeInference
+
+script = """
+O.O a
+O.O b
+:v a 2
+:v b 2_000_000_000
+:v b b
+:v a 0.5
+UwU a b
+O.O a
+UwU a
+"""
+
+t = Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass()
+Resolver().resolve(t)
+TypeInference().infer(t)
+_, _, sum_a, sum_b, sum_bb, sum_half, call, _, call_2 = t.children
+assert isinstance(sum_a.arguments[1].value, int)
+assert sum_a.arguments[0]._type == TYPE_INT
+assert sum_b.arguments[0]._type == TYPE_INT
+assert [x._type for x in sum_bb.arguments] == [TYPE_LONG, TYPE_INT]
+assert sum_half.arguments[0]._type == TYPE_DOUBLE
+assert [x._type for x in call.arguments] == [TYPE_DOUBLE, TYPE_LONG]
+# Declaring again starts over as an int.
+assert call_2.arguments[0]._type == TYPE_INT
+
+# A float plus an int past any double is a double.
+t = Pass(Parser(Tokenizer.from_string("O.O a\n:v a 0.5\n:v a " + '9' * 400 + "\nUwU a\n")).parse()).do_pass()
+Resolver().resolve(t)
+TypeInference().infer(t)
+assert t.children[-1].arguments[0]._type == TYPE_DOUBLE
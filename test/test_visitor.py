@@ -0,0 +1,61 @@
+import common
+
+from uwu_visitor import Visitor, node
+from uwu_parser import PLNumber, PLIndentifier
+from uwu_pass import PLDecl
+
+number = PLNumber(value = 2, token = None)
+identifier = PLIndentifier(id = '@_@', token = None)
+
+class Base(Visitor):
+    def visit_number(self, n):
+        return ('base', n.value)
+
+    def visit_identifier(self, id):
+        return ('base', id.id)
+
+class Child(Base):
+    def visit_number(self, n):
+        return ('child', n.value)
+
+# Overrides win, other methods come from the parent's table.
+assert Base().dispatch(number) == ('base', 2)
+assert Child().dispatch(number) == ('child', 2)
+assert Child().dispatch(identifier) == ('base', '@_@')
+assert Child._dispatch is not Base._dispatch
+assert Child._dispatch[PLNumber] is Child.visit_number
+assert Child._dispatch[PLIndentifier] is Base.visit_identifier
+# Nodes dispatch through the visitor they are given.
+assert number.visit(Child()) == ('child', 2)
+
+# Node types without a method, and types that are not nodes, go to
+# unknown_node.
+decl = PLDecl(type = 'INT', variable = identifier)
+for x in (decl, object()):
+    try:
+        Child().dispatch(x)
+        assert False
+    except RuntimeError as e:
+        assert 'Unknown syntax tree node' in str(e)
+
+class Lenient(Child):
+    def unknown_node(self, node):
+        return 'unknown'
+
+assert Lenient().dispatch(decl) == 'unknown'
+assert Lenient().dispatch(number) == ('child', 2)
+
+# Node types registered after a visitor was created are added to its
+# table.
+@node('visit_extra')
+class Extra:
+    pass
+
+class Late(Child):
+    def visit_extra(self, x):
+        return 'extra'
+
+assert Late().dispatch(Extra()) == 'extra'
+assert Extra in Child._dispatch
+assert Lenient().dispatch(Extra()) == 'unknown'
+print('Visitor OK')
@@ -0,0 +1,34 @@
+import common
+
+import contextlib
+import io
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser
+from uwu_pass import Pass
+from uwu_python_compiler import PythonCompiler
+from uwu_vm import load, run
+
+script = """
+O.O @_@
+O.O uwu
+:v @_@ 2
+:v uwu @_@
+:v uwu 0.5
+UwU @_@
+UwU uwu
+"""
+
+program = load(Tokenizer.from_string(script))
+print(list(program.code), program.consts, program.names)
+vm_out = io.StringIO()
+print(run(program, vm_out))
+
+source = io.StringIO()
+PythonCompiler(Pass(Parser(Tokenizer.from_string(script)).parse()).do_pass(), source).compile()
+py_out = io.StringIO()
+with contextlib.redirect_stdout(py_out):
+    exec(source.getvalue(), {})
+
+print(vm_out.getvalue())
+assert vm_out.getvalue() == py_out.getvalue()
@@ -0,0 +1,81 @@
+import common
+
+import io
+import os
+import tempfile
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_tree
+from uwu_python_compiler import PythonCompiler
+from uwu_watch import Watcher, changed_lines
+
+assert changed_lines(['a', 'b', 'c'], ['a', 'b', 'c']) is None
+assert changed_lines(['a', 'b', 'c'], ['a', 'x', 'c']) == (1, 2, 2)
+assert changed_lines(['a', 'b', 'c'], ['a', 'c']) == (0, 2, 1)
+assert changed_lines(['a', 'b'], ['b']) == (0, 2, 1)
+assert changed_lines(['a', 'c'], ['a', 'b', 'c']) == (1, 1, 2)
+
+def full_output(source):
+    o = io.StringIO()
+    compile_tree(Tokenizer.from_string(source), PythonCompiler, o)
+    return o.getvalue()
+
+def write(path, text, mtime):
+    with open(path, 'w', encoding = 'utf-8') as f:
+        f.write(text)
+    # Polling looks at mtimes, make sure every write changes it.
+    os.utime(path, ns = (mtime, mtime))
+
+def read(path):
+    with open(path, encoding = 'utf-8') as f:
+        return f.read()
+
+full_builds = []
+def full(path):
+    full_builds.append(path)
+    return f"failed {os.path.basename(path)}"
+
+with tempfile.TemporaryDirectory() as d:
+    a = os.path.join(d, 'a.uwu')
+    b = os.path.join(d, 'b.uwu')
+    write(a, "O.O x\n:v x 1\nUwU x\n", 1)
+    write(b, "O.O y\nUwU y\n", 1)
+    watcher = Watcher(lambda: sorted([a, b]), PythonCompiler, full)
+
+    assert [path for path, _, _ in watcher.poll()] == [a, b]
+    assert read(os.path.join(d, 'a.py')) == full_output(read(a))
+    assert watcher.poll() == []
+
+    write(a, "O.O x\n:v x 2\n:v x 3\nUwU x\n", 2)
+    (path, error, seconds), = watcher.poll()
+    assert path == a and error is None
+    assert read(os.path.join(d, 'a.py')) == full_output(read(a))
+    print(f"{path}: {seconds * 1000:.1f} ms")
+
+    # Errors of a save are reported with the line of the full source,
+    # and the output is removed until the file compiles again.
+    write(a, "O.O x\n:v x 2\nUwU z\n", 3)
+    (path, error, _), = watcher.poll()
+    assert error == f"{a}: UWUError: Undeclared variables: z [2:4].", error
+    assert full_builds == [] and not os.path.exists(os.path.join(d, 'a.py'))
+    write(a, "O.O x\n:v x 2\nUwU z z\n", 4)
+    (path, error, _), = watcher.poll()
+    assert 'z [2:4], z [2:6]' in error
+    # Lines that do not parse are not applied.
+    write(a, "O.O x x\n:v x 2\nUwU z z\n", 5)
+    (path, error, _), = watcher.poll()
+    assert 'RuntimeError' in error, error
+    write(a, "O.O x\n:v x 2\nUwU x\n", 6)
+    (path, error, _), = watcher.poll()
+    assert error is None and full_builds == []
+    assert read(os.path.join(d, 'a.py')) == full_output(read(a))
+
+    # A file failing its first build goes through a full build.
+    c = os.path.join(d, 'c.uwu')
+    write(c, "UwU z\n", 1)
+    watcher.sources = lambda: sorted([a, b, c])
+    (path, error, _), = watcher.poll()
+    assert error == "failed c.uwu" and full_builds == [c]
+
+    os.remove(b)
+    assert watcher.poll() == [] and b not in watcher.files
@@ -1,7 +1,13 @@
+import re
+
+from array import array
+from bisect import bisect_right
+from itertools import chain
+
 from collections.abc import Iterable
-from typing import Optional, Any
+from typing import Optional, Any, Union
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
 
 from uwu_exception import UWUTokenizerError
@@ -13,7 +19,7 @@ class TokenType(Enum):
     TYPE = auto()
     EOF = auto()
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     line: int
     col: int
@@ -24,7 +30,7 @@ class Token:
     type: TokenType
     value: Any
 
-@dataclass
+@dataclass(slots=True)
 class SourcePosition:
     line: int
     col: int
@@ -44,21 +50,23 @@ class Tokenizer:
     
     _last_token: Optional[Token]
 
-    def __init__(self, source: Iterable[str], source_name: Optional[str] = None, source_path: Optional[str] = None) -> None:
+    def __init__(self, source: Iterable[str], source_name: Optional[str] = None, source_path: Optional[str] = None, line: int = 0, offset: int = 0) -> None:
+        # line and offset are where source starts in the whole file, for
+        # sources that are a part of it starting at the start of a line.
         self.source = source
         self.source_name = source_name
         self.source_path = source_path
 
-        self._line = 0
+        self._line = line
         self._col = 0
-        self._char = 0
-        self._current_char_position = SourcePosition(0, 0, 0)
+        self._char = offset
+        self._current_char_position = SourcePosition(line, 0, offset)
         self._last_char = ''
         self._rescue_last_char = False
         self._last_token = None
 
     def make_error(self, msg: str) -> UWUTokenizerError:
-        return UWUTokenizerError(msg)
+        return UWUTokenizerError(msg, self)
 
     def make_token(self, type: TokenType, value: Any = None, start_position: Optional[SourcePosition] = None) -> Token:
         line = self._line
@@ -159,14 +167,23 @@ class Tokenizer:
             pass
 
         s = ''.join(t)
-        return self.make_token(TokenType.NUMBER, float(s), original_position)
+        try:
+            value = float(s) if '.' in s else int(s)
+        except ValueError:
+            # At the first digit, like the other tokenizers.
+            self._line = original_position.line
+            self._col = original_position.col + 1
+            self._char = original_position.n + 1
+            raise self.make_error(f"Number literal has too many digits.")
+        return self.make_token(TokenType.NUMBER, value, original_position)
 
     def next(self) -> Token:
         try:
             while True:
                 c = self.next_char()
-                if c == '\n' and not self.is_last_token(TokenType.NL):
-                    return self.make_token(type = TokenType.NL)
+                if c == '\n':
+                    if not self.is_last_token(TokenType.NL):
+                        return self.make_token(type = TokenType.NL)
                 elif self.is_name_start(c):
                     return self.name(c, self._current_char_position)
                 elif c in '\t ':
@@ -192,7 +209,307 @@ class Tokenizer:
         return iter(self.generator())
     
     @classmethod
-    def from_string(cls, s: str) -> 'Tokenizer':
+    def wrap_source(cls, s: str) -> Iterable[str]:
+        return iter(s)
+
+    @classmethod
+    def wrap_chunks(cls, chunks: Iterable[str]) -> Iterable[str]:
+        return chain.from_iterable(chunks)
+
+    @classmethod
+    def from_string(cls, s: str, engine: Optional[str] = None) -> 'Tokenizer':
         name = '<string>'
-        source = iter(s)
-        return cls(source = source, source_name = name)
\ No newline at end of file
+        if engine is not None:
+            cls = get_engine(engine)
+        source = cls.wrap_source(s)
+        return cls(source = source, source_name = name)
+
+_NAME_RUN = re.compile(r'[A-Za-z0-9_!.@/\\~:]*')
+_DIGIT_RUN = re.compile(r'[0-9_]*')
+_BLANK_RUN = re.compile(r'[\t ]*')
+
+class BulkTokenizer(Tokenizer):
+    """
+    Tokenizer that scans the whole buffer with compiled regular
+    expressions, keeping offsets instead of per character state.
+
+    It produces the same tokens as Tokenizer, quirks included: spans
+    count the character that ended the token, except at the end of
+    the source.
+
+    source is either one string or an iterable of string chunks. Chunks
+    are regrouped into whole lines, so only the current line is kept
+    across chunk boundaries.
+    """
+    source: Union[str, Iterable[str]]
+
+    def __init__(self, source: Union[str, Iterable[str]], source_name: Optional[str] = None, source_path: Optional[str] = None, line: int = 0, offset: int = 0) -> None:
+        super().__init__(source, source_name = source_name, source_path = source_path, line = line, offset = offset)
+        self._tokens = self.scan()
+
+    @classmethod
+    def wrap_source(cls, s: str) -> str:
+        return s
+
+    @classmethod
+    def wrap_chunks(cls, chunks: Iterable[str]) -> Iterable[str]:
+        return chunks
+
+    def next(self) -> Token:
+        try:
+            return self.emit(*next(self._tokens))
+        except StopIteration:
+            return self.eof_token()
+
+    def emit(self, type: TokenType, value: Any, line: int, col: int, n: int, span: int) -> Token:
+        t = Token(
+            type = type, value = value,
+            source_name = self.source_name, source_path = self.source_path,
+            line = line, col = col, n = n, span = span
+            )
+        self._last_token = t
+        return t
+
+    def fail(self, msg: str, c: str, n: int, line: int, col: int) -> UWUTokenizerError:
+        """
+        Build the error with the position Tokenizer would have after
+        consuming the character c, found at n.
+        """
+        self._char = n + 1
+        if c == '\n':
+            self._line = line + 1
+            self._col = 0
+        else:
+            self._line = line
+            self._col = col + 1
+        return self.make_error(msg)
+
+    def name_end(self, s: str, j: int) -> int:
+        size = len(s)
+        j = _NAME_RUN.match(s, j).end()
+        while j < size and s[j] > '\x7f' and self.is_name_character(s[j]):
+            j = _NAME_RUN.match(s, j + 1).end()
+        return j
+
+    def digits_end(self, s: str, j: int) -> int:
+        size = len(s)
+        j = _DIGIT_RUN.match(s, j).end()
+        while j < size and s[j] > '\x7f' and s[j].isdigit():
+            j = _DIGIT_RUN.match(s, j + 1).end()
+        return j
+
+    def pieces(self) -> Iterable[str]:
+        """
+        Yield the source in pieces that end right after a newline,
+        except for the last one.
+        """
+        if isinstance(self.source, str):
+            yield self.source
+            return
+
+        carry = []
+        for chunk in self.source:
+            cut = chunk.rfind('\n') + 1
+            if cut == 0:
+                carry.append(chunk)
+                continue
+            carry.append(chunk[:cut])
+            yield ''.join(carry)
+            carry = [chunk[cut:]]
+        yield ''.join(carry)
+
+    def scan(self):
+        """
+        Yield every token but EOF as a (type, value, line, col, n, span)
+        tuple, without building Token objects.
+        """
+        line = self._line
+        last = None
+        base = self._char
+        line_start = 0
+        for s in self.pieces():
+            # A token never crosses a newline, so a piece ending in one
+            # scans exactly like the whole source would.
+            size = len(s)
+            line_start = 0
+            i = 0
+            while i < size:
+                c = s[i]
+                if c == '\n':
+                    line += 1
+                    line_start = i + 1
+                    if last is not TokenType.NL:
+                        last = TokenType.NL
+                        yield (TokenType.NL, None, line, 0, base + i + 1, 1)
+                    i += 1
+                elif c == ' ' or c == '\t':
+                    i = _BLANK_RUN.match(s, i).end()
+                elif self.is_name_start(c):
+                    j = self.name_end(s, i + 1)
+                    span = j - i if j < size else j - i - 1
+                    last = TokenType.NAME
+                    yield (TokenType.NAME, s[i:j], line, i - line_start, base + i, span)
+                    i = j
+                elif c.isdigit():
+                    j = self.digits_end(s, i + 1)
+                    if j < size and s[j] == '.':
+                        k = j + 1
+                        if k >= size:
+                            j = size
+                        elif s[k].isdigit() or s[k] == '_':
+                            j = self.digits_end(s, k)
+                        else:
+                            raise self.fail(f"Expected digit or underscore after dot in decimal.", s[k], base + k, line, k - line_start)
+                    span = j - i if j < size else j - i - 1
+                    text = s[i:j].replace('_', '')
+                    try:
+                        value = float(text) if '.' in text else int(text)
+                    except ValueError:
+                        raise self.fail(f"Number literal has too many digits.", c, base + i, line, i - line_start)
+                    last = TokenType.NUMBER
+                    yield (TokenType.NUMBER, value, line, i - line_start, base + i, span)
+                    i = j
+                else:
+                    raise self.fail(f"Unknown token. {repr(c)}", c, base + i, line, i - line_start)
+            base += size
+
+        self._line = line
+        self._col = size - line_start
+        self._char = base
+
+class LineIndex:
+    """
+    Offsets where the lines of one source start, so the line and column
+    of an offset are found with a bisect instead of being tracked for
+    every token.
+    """
+    def __init__(self, source_name: Optional[str] = None, source_path: Optional[str] = None, line: int = 0, offset: int = 0) -> None:
+        self.source_name = source_name
+        self.source_path = source_path
+        self.first_line = line
+        self.starts = array('q', [offset])
+
+    def position(self, n: int) -> tuple:
+        """
+        (line, col) of the character at offset n.
+        """
+        i = bisect_right(self.starts, n) - 1
+        return self.first_line + i, n - self.starts[i]
+
+@dataclass(slots=True)
+class OffsetToken:
+    """
+    Token holding only its offset and span. line, col and the source
+    metadata are looked up in the LineIndex of its source when read.
+    """
+    n: int
+    span: int
+    type: TokenType
+    value: Any
+    index: LineIndex = field(repr = False, compare = False)
+
+    @property
+    def line(self) -> int:
+        return self.index.position(self.n)[0]
+
+    @property
+    def col(self) -> int:
+        return self.index.position(self.n)[1]
+
+    @property
+    def source_name(self) -> Optional[str]:
+        return self.index.source_name
+
+    @property
+    def source_path(self) -> Optional[str]:
+        return self.index.source_path
+
+class OffsetTokenizer(BulkTokenizer):
+    """
+    BulkTokenizer building OffsetTokens. Only the start of every line is
+    recorded while scanning, in self.index; lines and columns are
+    computed from it for the tokens and errors that need them.
+    """
+    def __init__(self, source: Union[str, Iterable[str]], source_name: Optional[str] = None, source_path: Optional[str] = None, line: int = 0, offset: int = 0) -> None:
+        self.index = LineIndex(source_name, source_path, line, offset)
+        Tokenizer.__init__(self, source, source_name = source_name, source_path = source_path, line = line, offset = offset)
+        self._tokens = self.scan_offsets()
+
+    def next(self) -> OffsetToken:
+        try:
+            type, value, n, span = next(self._tokens)
+        except StopIteration:
+            return self.eof_token()
+        t = OffsetToken(n, span, type, value, self.index)
+        self._last_token = t
+        return t
+
+    def eof_token(self) -> OffsetToken:
+        t = OffsetToken(self._char, 1, TokenType.EOF, None, self.index)
+        self._last_token = t
+        return t
+
+    def fail(self, msg: str, c: str, n: int, line: Optional[int] = None, col: Optional[int] = None) -> UWUTokenizerError:
+        line, col = self.index.position(n)
+        return super().fail(msg, c, n, line, col)
+
+    def scan_offsets(self):
+        """
+        Yield every token but EOF as a (type, value, n, span) tuple,
+        like scan does but without lines and columns.
+        """
+        add_line = self.index.starts.append
+        last = None
+        base = self._char
+        for s in self.pieces():
+            size = len(s)
+            i = 0
+            while i < size:
+                c = s[i]
+                if c == '\n':
+                    add_line(base + i + 1)
+                    if last is not TokenType.NL:
+                        last = TokenType.NL
+                        yield (TokenType.NL, None, base + i + 1, 1)
+                    i += 1
+                elif c == ' ' or c == '\t':
+                    i = _BLANK_RUN.match(s, i).end()
+                elif self.is_name_start(c):
+                    j = self.name_end(s, i + 1)
+                    last = TokenType.NAME
+                    yield (TokenType.NAME, s[i:j], base + i, j - i if j < size else j - i - 1)
+                    i = j
+                elif c.isdigit():
+                    j = self.digits_end(s, i + 1)
+                    if j < size and s[j] == '.':
+                        k = j + 1
+                        if k >= size:
+                            j = size
+                        elif s[k].isdigit() or s[k] == '_':
+                            j = self.digits_end(s, k)
+                        else:
+                            raise self.fail(f"Expected digit or underscore after dot in decimal.", s[k], base + k)
+                    text = s[i:j].replace('_', '')
+                    try:
+                        value = float(text) if '.' in text else int(text)
+                    except ValueError:
+                        raise self.fail(f"Number literal has too many digits.", c, base + i)
+                    last = TokenType.NUMBER
+                    yield (TokenType.NUMBER, value, base + i, j - i if j < size else j - i - 1)
+                    i = j
+                else:
+                    raise self.fail(f"Unknown token. {repr(c)}", c, base + i)
+            base += size
+        self._char = base
+
+ENGINES = {
+    'char': Tokenizer,
+    'bulk': BulkTokenizer,
+    'offset': OffsetTokenizer,
+}
+
+def get_engine(name: str) -> type:
+    cls = ENGINES.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown tokenizer engine. {name}")
+    return cls
\ No newline at end of file
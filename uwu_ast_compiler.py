@@ -0,0 +1,113 @@
+import ast
+import importlib.util
+import marshal
+
+from uwu_pass import PLCall, PLDecl, PLStx
+from uwu_parser import TreeRoot, PLNumber, PLIndentifier
+from uwu_python_compiler import PythonCompiler
+
+class AstCompiler(PythonCompiler):
+    """
+    Python backend that builds an ast.Module instead of source text, so
+    the program can be turned into a code object or a .pyc without
+    going through CPython's tokenizer and parser.
+
+    Names are mangled by PythonCompiler.mangler, like the text
+    backend. o, when given, receives the .pyc bytes.
+    """
+    EXT = '.pyc'
+    BINARY = True
+    # Only the interpreter that wrote a .pyc can load it.
+    CACHE_KEY = importlib.util.MAGIC_NUMBER.hex()
+    # Code objects and tracebacks name the source, see main._comp.
+    NAMES_SOURCE = True
+
+    def __init__(self, t, o, filename: str = '<uwu>') -> None:
+        super().__init__(t, None)
+        self.o = o
+        self.filename = filename
+        self.body = []
+
+    def begin(self) -> None:
+        self.body = []
+
+    def end(self) -> None:
+        if self.o is not None:
+            self.write_pyc(self.o)
+
+    def flush(self) -> None:
+        pass
+
+    def module(self) -> ast.Module:
+        return ast.fix_missing_locations(ast.Module(body = self.body, type_ignores = []))
+
+    def code(self):
+        return compile(self.module(), self.filename, 'exec')
+
+    def write_pyc(self, o) -> None:
+        # Timestamp based pyc (flags 0) with mtime and size left at 0.
+        # It is run directly, there is no .py next to it to check.
+        o.write(importlib.util.MAGIC_NUMBER)
+        o.write(bytes(12))
+        o.write(marshal.dumps(self.code()))
+
+    def statement(self, stmt: ast.stmt, id: PLIndentifier) -> None:
+        token = id.token
+        stmt.lineno = stmt.end_lineno = token.line + 1
+        stmt.col_offset = stmt.end_col_offset = token.col
+        self.body.append(stmt)
+
+    def format_args(self, args: list) -> list:
+        return [self.dispatch(x) for x in args]
+
+    def visit_call(self, call: PLCall) -> None:
+        callee = call.callee
+        args = call.arguments
+
+        if not isinstance(callee, PLIndentifier):
+            raise RuntimeError(f"Python compiler does not support callees that are not built-in.")
+
+        f_name = self.get_call_name(callee.id)
+        value = ast.Call(func = ast.Name(id = f_name, ctx = ast.Load()), args = self.format_args(args), keywords = [])
+        self.statement(ast.Expr(value = value), callee)
+
+    def visit_root(self, root: TreeRoot) -> None:
+        for child in root.children:
+            self.dispatch(child)
+
+    def visit_number(self, n: PLNumber) -> ast.expr:
+        return ast.Constant(value = n.value)
+
+    def visit_identifier(self, id: PLIndentifier) -> ast.expr:
+        return ast.Name(id = self.name(id), ctx = ast.Load())
+
+    DECL_INITIALIZER = {
+        'INT': 0
+    }
+
+    def get_decl_initializer(self, name: str) -> int:
+        v = self.DECL_INITIALIZER.get(name)
+        if v is None:
+            raise RuntimeError(f"Declaration initializer not found {name}.")
+        return v
+
+    def visit_decl(self, decl: PLDecl) -> None:
+        var = self.name(decl.variable)
+        initializer = self.get_decl_initializer(decl.type)
+        target = ast.Name(id = var, ctx = ast.Store())
+        self.statement(ast.Assign(targets = [target], value = ast.Constant(value = initializer)), decl.variable)
+
+    def visit_stx(self, stx: PLStx) -> None:
+        name = stx.name
+
+        if name == 'SUM':
+            if len(stx.arguments) != 2:
+                raise RuntimeError(f"Expected 2 parameters in SUM syntax. An identifier and a value.")
+            iden, val = stx.arguments
+            if not isinstance(iden, PLIndentifier):
+                raise RuntimeError(f"Expected identifier as first parameter in SUM syntax.")
+            target = ast.Name(id = self.name(iden), ctx = ast.Store())
+            self.statement(ast.AugAssign(target = target, op = ast.Add(), value = self.dispatch(val)), iden)
+            return
+
+        raise RuntimeError(f"Unknown syntax name. {name}")
@@ -0,0 +1,29 @@
+import importlib
+
+# Target name to (module, class). Modules are only imported by
+# get_backend, so a run pays for the backend it uses and no other.
+BACKENDS = {
+    'python': ('uwu_python_compiler', 'PythonCompiler'),
+    'python-fast-locals': ('uwu_python_compiler', 'FastLocalsPythonCompiler'),
+    'c': ('uwu_c_compiler', 'CCompiler'),
+    'pyc': ('uwu_ast_compiler', 'AstCompiler'),
+}
+
+# Optimization levels of the C compiler for native builds. They live
+# here rather than in uwu_cbuild so main.py can offer them without
+# importing the builder.
+CC_OPT_LEVELS = ('0', '1', '2', '3', 's')
+DEFAULT_CC_OPT = '2'
+
+def register(target: str, module: str, name: str) -> None:
+    """
+    Add a backend, the class name in module, compiling to target.
+    """
+    BACKENDS[target] = (module, name)
+
+def get_backend(target: str) -> type:
+    entry = BACKENDS.get(target)
+    if entry is None:
+        raise ValueError(f"Unknown backend. {target}")
+    module, name = entry
+    return getattr(importlib.import_module(module), name)
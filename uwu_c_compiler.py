@@ -1,6 +1,14 @@
+import math
+
+from typing import Optional
 
 from uwu_pass import PLCall, PLDecl, PLStx
 from uwu_parser import TreeRoot, PLNumber, PLIndentifier
+from uwu_visitor import Visitor
+from uwu_emitter import Emitter, DEFAULT_FLUSH_THRESHOLD
+from uwu_mangle import Mangler, C_RESERVED
+from uwu_resolve import Resolver, Symbols, TYPE_INT, TYPE_LONG, TYPE_DOUBLE
+from uwu_types import TypeInference, literal_type
 
 class Func:
     pass
@@ -12,7 +20,10 @@ class Printf(Func):
         self.compiler = compiler
     
     FORMAT_OPT = {
-        'int': '%d'
+        'int': '%d',
+        'long long': '%lld',
+        # Formatted by uwu_repr, see CCompiler.begin.
+        'double': '%s',
     }
 
     def get_f_string(self, f) -> str:
@@ -24,62 +35,116 @@ class Printf(Func):
     def format_args(self, args):
         types = [self.compiler.get_var_type(x) for x in args]
         types_f = [self.get_f_string(x) for x in types]
-        t = [x.visit(self.compiler) for x in args]
-        t.insert(0, '"{}"'.format(' '.join(types_f)))
+        t = [self.format_arg(x, y) for x, y in zip(args, types)]
+        t.insert(0, '"{}\\n"'.format(' '.join(types_f)))
         return ', '.join(t)
 
-class CCompiler:
+    def format_arg(self, x, type: str) -> str:
+        v = self.compiler.dispatch(x)
+        if type == 'double':
+            return f'uwu_repr({v}, (char[32]){{0}})'
+        return v
+
+class CCompiler(Visitor):
     EXT = '.c'
+    # Variables take the type TypeInference gives them, see visit_stx.
+    INFER_TYPES = True
+    # Names a variable cannot take in the output.
+    RESERVED = C_RESERVED
 
-    def __init__(self, t, o) -> None:
+    def __init__(self, t, o, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD, line_file: Optional[str] = None) -> None:
+        """
+        With line_file, every statement is preceded by a #line directive
+        naming that file, so C compiler errors point at the UWU source.
+        """
         self.t = t
-        self.o = o
+        self.line_file = line_file
+        self.o = Emitter.wrap(o, flush_threshold)
+        self.symbols = Symbols()
+        self.mangler = Mangler(self.RESERVED)
+        self._names = []
+        # C variable currently holding each slot, and its type.
+        self._var_names = []
+        self._var_types = []
+
+    VAR_TYPES = {
+        TYPE_INT: 'int',
+        TYPE_LONG: 'long long',
+        TYPE_DOUBLE: 'double',
+    }
 
-        self._var_types = {}
-    
-    def set_var_type(self, key, type):
-        self._var_types[key] = type
-    
     def get_var_type_literal(self, val) -> str:
-        if isinstance(val, int):
-            return 'int'
-        elif isinstance(val, float):
-            return 'float'
-        else:
+        if not isinstance(val, (int, float)):
             raise RuntimeError(f"Type of literal value. {repr(val)} not known.")
+        return self.VAR_TYPES[literal_type(val)]
 
     def get_var_type(self, key):
         if isinstance(key, PLIndentifier):
-            key = key.id
+            v = self.VAR_TYPES.get(key._type)
+            if v is None:
+                raise RuntimeError(f"Unknown var type. {key.id}")
+            return v
         elif isinstance(key, PLNumber):
-            val = key.value
-            key = self.get_var_type_literal(val)
-        elif not isinstance(key, str):
-            raise TypeError(f"Expected a PLIdentifier PLNumber or str. {key}")
-
-        v = self._var_types.get(key)
-        if v is None:
-            raise RuntimeError(f"Unknown var type. {key}")
-        return v
+            return self.get_var_type_literal(key.value)
+        raise TypeError(f"Expected a PLIdentifier or PLNumber. {key}")
 
     def compile(self) -> None:
+        Resolver(self.symbols).resolve(self.t)
+        TypeInference().infer(self.t)
+        self.begin()
+        self.dispatch(self.t)
+        self.end()
+        self.flush()
+
+    def compile_stream(self, nodes) -> None:
+        self.begin()
+        for node in TypeInference().infer_stream(Resolver(self.symbols).resolve_stream(nodes)):
+            self.dispatch(node)
+        self.end()
+        self.flush()
+
+    # Writes a double to buf the way Python's repr does: the shortest
+    # digits reading back as the same double, in exponent notation
+    # below 1e-4 and from 1e16 on, with a .0 when it is integral.
+    REPR = '''\
+static const char* uwu_repr(double x, char* buf) {
+    int digits, exp;
+    if (x != x) return "nan";
+    if (x > DBL_MAX) return "inf";
+    if (x < -DBL_MAX) return "-inf";
+    for (digits = 1; ; digits++) {
+        snprintf(buf, 32, "%.*e", digits - 1, x);
+        if (digits == 17 || strtod(buf, NULL) == x) break;
+    }
+    exp = atoi(strchr(buf, 'e') + 1);
+    if (exp < -4 || exp >= 16) return buf;
+    snprintf(buf, 32, "%.*f", digits - 1 - exp > 0 ? digits - 1 - exp : 0, x);
+    if (!strchr(buf, '.')) strcat(buf, ".0");
+    return buf;
+}'''
+
+    def begin(self) -> None:
+        self.writeln('#include <float.h>')
         self.writeln('#include <stdio.h>')
+        self.writeln('#include <stdlib.h>')
+        self.writeln('#include <string.h>')
+        self.writeln(self.REPR)
         self.writeln('int main(int argc, char** argv) {')
-        self.t.visit(self)
+
+    def end(self) -> None:
         self.writeln('return 0;\n}')
 
+    def line(self, id: PLIndentifier) -> None:
+        if self.line_file is not None:
+            f = self.line_file.replace('\\', '\\\\').replace('"', '\\"')
+            self.writeln(f'#line {id.token.line + 1} "{f}"')
+
     def write(self, s) -> None:
         self.o.write(s)
     def writeln(self, s) -> None:
-        self.o.write(s)
-        self.o.write('\n')
-
-    def __getattr__(self, name):
-        if name.startswith('visit_'):
-            def f(t):
-                raise RuntimeError(f"Unknown syntax tree node. {t}")
-            return f
-        raise super().__getattribute__(name)
+        self.o.writeln(s)
+    def flush(self) -> None:
+        self.o.flush()
     
     CALL_NAMES = {
         'UwU': Printf,
@@ -92,7 +157,7 @@ class CCompiler:
         return f(self)
     
     def format_args(self, args: list) -> str:
-        t = [x.visit(self) for x in args]
+        t = [self.dispatch(x) for x in args]
         return ', '.join(t)
 
     def visit_call(self, call: PLCall) -> None:
@@ -104,28 +169,47 @@ class CCompiler:
 
         f = self.get_call_name(callee.id)
         arg_list = f.format_args(args)
+        self.line(callee)
         self.writeln(f"{f.f_name}({arg_list});")
     
     def visit_root(self, root: TreeRoot) -> None:
         for child in root.children:
-            child.visit(self)
+            self.dispatch(child)
     
     def visit_number(self, n: PLNumber) -> str:
-        return '{}'.format(n.value)
+        value = n.value
+        if isinstance(value, int):
+            type = literal_type(value)
+            if type == TYPE_LONG:
+                return f'{value}LL'
+            if type == TYPE_DOUBLE:
+                # Too large for a long long.
+                try:
+                    value = float(value)
+                except OverflowError:
+                    value = math.inf
+        if value == math.inf:
+            # Past DBL_MAX, rounds to infinity like the literal would.
+            return '(DBL_MAX * 2)'
+        return repr(value)
     
 
-    def make_name_safe(self, name: str) -> str:
-        name = name.replace('@', '_at_')
-        name = name.replace('!', '_bang_')
-        name = name.replace('.', '_dot_')
-        name = name.replace('/', '_slash_')
-        name = name.replace('\\', '_bslash_')
-        name = name.replace('~', '_tilde_')
-        name = name.replace(':', '_colon_')
-        return name
-    
+    def declared_name(self, slot: int) -> str:
+        """
+        Safe name of the variable in slot, mangled once per slot.
+        """
+        try:
+            return self._names[slot]
+        except IndexError:
+            names = self._names
+            names.extend(self.mangler.mangle(x) for x in self.symbols.names[len(names):])
+            return names[slot]
+
+    def name(self, id: PLIndentifier) -> str:
+        return self._var_names[id._who]
+
     def visit_identifier(self, id: PLIndentifier) -> str:
-        return self.make_name_safe(id.id)
+        return self.name(id)
 
     def get_decl_initializer(self, name: str) -> str:
         v = self.DECL_INITIALIZER.get(name)
@@ -134,11 +218,17 @@ class CCompiler:
         return v
 
     def visit_decl(self, decl: PLDecl) -> None:
-        _var = decl.variable.id
-        var = self.make_name_safe(decl.variable.id)
+        slot = decl.variable._who
+        var = self.declared_name(slot)
         _type = decl.type
         type_name, initializer = self.get_decl_initializer(_type)
-        self.set_var_type(_var, type_name)
+        if slot >= len(self._var_names):
+            grow = slot + 1 - len(self._var_names)
+            self._var_names.extend([None] * grow)
+            self._var_types.extend([None] * grow)
+        self._var_names[slot] = var
+        self._var_types[slot] = TYPE_INT
+        self.line(decl.variable)
         self.writeln(f"{type_name} {var} = {initializer};")
 
     DECL_INITIALIZER = {
@@ -154,8 +244,17 @@ class CCompiler:
             iden, val = stx.arguments
             if not isinstance(iden, PLIndentifier):
                 raise RuntimeError(f"Expected identifier as first parameter in SUM syntax.")
-            val = val.visit(self)
-            var = self.make_name_safe(iden.id)
+            val = self.dispatch(val)
+            self.line(iden)
+            slot = iden._who
+            if iden._type != self._var_types[slot]:
+                # A C variable cannot change type, continue in a wider one.
+                type_name = self.VAR_TYPES[iden._type]
+                var = self.mangler.derived(self.symbols.names[slot], type_name.replace(' ', '_'))
+                self.writeln(f"{type_name} {var} = {self._var_names[slot]};")
+                self._var_names[slot] = var
+                self._var_types[slot] = iden._type
+            var = self._var_names[slot]
             self.writeln(f"{var} += {val};")
             return
         
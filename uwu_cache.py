@@ -0,0 +1,188 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from contextlib import contextmanager
+from typing import Optional
+
+from uwu_source import read_blocks
+from uwu_version import VERSION
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def default_cache_dir() -> str:
+    root = os.environ.get('UWU_CACHE_DIR')
+    if root:
+        return root
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'uwu')
+
+class CompileCache:
+    """
+    On disk cache of compiled outputs, keyed by a hash of the source,
+    the backend and the compiler version.
+
+    Entries are written to a temporary file and renamed into place, so
+    readers never see a partial entry. A hit refreshes the entry's
+    mtime, and eviction drops the least recently used entries once the
+    cache grows past max_bytes. Eviction takes a lock file so parallel
+    builds do not evict at the same time.
+    """
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, path: str, compiler_cls, *options) -> str:
+        """
+        options are any other settings that change the output, like the
+        optimization level. Backends whose output also depends on the
+        environment, like the Python version, describe it in CACHE_KEY.
+        """
+        h = hashlib.sha256()
+        h.update(f'{VERSION}\0{compiler_cls.__module__}.{compiler_cls.__qualname__}\0{compiler_cls.EXT}\0'.encode('utf-8'))
+        h.update(f'{getattr(compiler_cls, "CACHE_KEY", "")}\0'.encode('utf-8'))
+        for x in options:
+            h.update(f'{x}\0'.encode('utf-8'))
+        with open(path, 'rb') as f:
+            for b in read_blocks(f):
+                h.update(b)
+        return h.hexdigest()
+
+    def key_data(self, data: bytes, *options) -> str:
+        """
+        Key of an output built from data rather than from a source file.
+        """
+        h = hashlib.sha256()
+        h.update(f'{VERSION}\0'.encode('utf-8'))
+        for x in options:
+            h.update(f'{x}\0'.encode('utf-8'))
+        h.update(data)
+        return h.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key: str, target: str) -> bool:
+        """
+        Copy the entry for key to target. Returns False on a miss.
+        """
+        entry = self.entry_path(key)
+        try:
+            shutil.copyfile(entry, target)
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Path of the entry for key, to be used in place. Returns None on a
+        miss.
+        """
+        entry = self.entry_path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        return entry
+
+    def store(self, key: str, source: str, mode: Optional[int] = None) -> None:
+        """
+        Copy the file at source into the cache as the entry for key,
+        with permissions mode if given.
+        """
+        entry = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok = True)
+        fd, tmp = tempfile.mkstemp(dir = os.path.dirname(entry), prefix = '.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as o:
+                with open(source, 'rb') as f:
+                    shutil.copyfileobj(f, o)
+            if mode is not None:
+                os.chmod(tmp, mode)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, entry)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict(size)
+
+    @contextmanager
+    def lock(self):
+        os.makedirs(self.root, exist_ok = True)
+        with open(os.path.join(self.root, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entries(self) -> list:
+        t = []
+        for d in os.scandir(self.root):
+            if not d.is_dir():
+                continue
+            for e in os.scandir(d.path):
+                if e.name.startswith('.'):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                t.append((st.st_mtime, st.st_size, e.path))
+        return t
+
+    def size_path(self) -> str:
+        return os.path.join(self.root, '.size')
+
+    def read_size(self) -> int:
+        """
+        Running total of the entry sizes, kept in the cache root so a
+        store does not have to scan every entry. Call with the lock held.
+        """
+        try:
+            with open(self.size_path(), 'r') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return sum(x[1] for x in self.entries())
+
+    def write_size(self, total: int) -> None:
+        with open(self.size_path(), 'w') as f:
+            f.write(str(total))
+
+    def evict(self, added: int = 0) -> None:
+        with self.lock():
+            total = self.read_size() + added
+            if total > self.max_bytes:
+                # The running total may be stale, recount before evicting.
+                entries = self.entries()
+                total = sum(x[1] for x in entries)
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            self.write_size(total)
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        with self.lock():
+            for _, _, path in self.entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self.write_size(0)
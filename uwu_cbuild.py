@@ -0,0 +1,84 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+from typing import Optional
+
+from uwu_cache import CompileCache
+from uwu_backends import CC_OPT_LEVELS, DEFAULT_CC_OPT
+
+def find_cc() -> str:
+    """
+    C compiler to use: $CC, else cc or gcc from PATH.
+    """
+    cc = os.environ.get('CC') or shutil.which('cc') or shutil.which('gcc')
+    if not cc:
+        raise RuntimeError("No C compiler found. Install cc or gcc, or set $CC.")
+    return cc
+
+class CBuilder:
+    """
+    Builds the output of CCompiler into native executables.
+
+    With a cache, executables are kept keyed by a hash of the C source,
+    the C compiler and its flags, so building an unchanged program
+    again does not run the C compiler. Compile CCompiler with line_file
+    set so errors of the C compiler point at the .uwu source.
+    """
+    def __init__(self, cache: Optional[CompileCache] = None, cc: Optional[str] = None, opt: str = DEFAULT_CC_OPT) -> None:
+        if opt not in CC_OPT_LEVELS:
+            raise ValueError(f"Unknown C optimization level. {opt}")
+        self.cache = cache
+        self.cc = cc or find_cc()
+        self.flags = [f'-O{opt}']
+
+    def key(self, c_source: str) -> str:
+        return self.cache.key_data(c_source.encode('utf-8'), 'native', self.cc, *self.flags)
+
+    def compile(self, c_source: str, target: str) -> None:
+        """
+        Run the C compiler, writing the executable to target.
+        """
+        with tempfile.TemporaryDirectory(prefix = 'uwu-') as d:
+            c_path = os.path.join(d, 'main.c')
+            with open(c_path, 'w', encoding = 'utf-8') as f:
+                f.write(c_source)
+            try:
+                p = subprocess.run([self.cc, *self.flags, '-o', target, c_path], capture_output = True, text = True)
+            except OSError as e:
+                raise RuntimeError(f"Could not run the C compiler {self.cc}. {e}")
+        if p.returncode != 0:
+            raise RuntimeError(f"C compiler failed.\n{p.stderr.rstrip()}")
+
+    def build(self, c_source: str, target: str) -> None:
+        """
+        Write the executable for c_source to target, from the cache when
+        possible.
+        """
+        if self.cache is None:
+            self.compile(c_source, target)
+            return
+        key = self.key(c_source)
+        if not self.cache.fetch(key, target):
+            self.compile(c_source, target)
+            self.cache.store(key, target, mode = 0o755)
+        os.chmod(target, 0o755)
+
+    def run(self, c_source: str, args: tuple = ()) -> int:
+        """
+        Build and run c_source, returning its exit status. A cached
+        executable is run in place.
+        """
+        if self.cache is not None:
+            key = self.key(c_source)
+            exe = self.cache.lookup(key)
+            if exe is not None:
+                return subprocess.run([exe, *args]).returncode
+
+        with tempfile.TemporaryDirectory(prefix = 'uwu-') as d:
+            target = os.path.join(d, 'main')
+            self.compile(c_source, target)
+            if self.cache is not None:
+                self.cache.store(key, target, mode = 0o755)
+            return subprocess.run([target, *args]).returncode
@@ -0,0 +1,63 @@
+import os
+
+DEFAULT_FLUSH_THRESHOLD = 1 << 16
+
+class Emitter:
+    """
+    Collects the text written by a backend and hands it to the sink in
+    chunks of at least flush_threshold characters.
+
+    The sink is a file descriptor, an object with a write method (a text
+    file, a StringIO) or any callable taking a str. bytes_emitted counts
+    the encoded size of what was flushed so far.
+    """
+    def __init__(self, sink, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD, encoding: str = 'utf-8') -> None:
+        self.sink = sink
+        self.flush_threshold = flush_threshold
+        self.encoding = encoding
+        self.bytes_emitted = 0
+
+        self._parts = []
+        self._size = 0
+        if isinstance(sink, int):
+            self._write = self._write_fd
+        elif hasattr(sink, 'write'):
+            self._write = sink.write
+        elif callable(sink):
+            self._write = sink
+        else:
+            raise TypeError(f"Expected a file descriptor, a writable object or a callable. {sink}")
+
+    @classmethod
+    def wrap(cls, o, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        if o is None or isinstance(o, Emitter):
+            return o
+        return cls(o, flush_threshold)
+
+    def _write_fd(self, s: str) -> None:
+        b = memoryview(s.encode(self.encoding))
+        while b:
+            n = os.write(self.sink, b)
+            b = b[n:]
+
+    def write(self, s: str) -> None:
+        self._parts.append(s)
+        self._size += len(s)
+        if self._size >= self.flush_threshold:
+            self.flush()
+
+    def writeln(self, s: str) -> None:
+        self._parts.append(s)
+        self._parts.append('\n')
+        self._size += len(s) + 1
+        if self._size >= self.flush_threshold:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._parts:
+            return
+        s = ''.join(self._parts)
+        self._parts = []
+        self._size = 0
+        self._write(s)
+        self.bytes_emitted += len(s) if s.isascii() else len(s.encode(self.encoding))
@@ -5,7 +5,7 @@ class UWUException(Exception):
 class UWUError(Exception):
     pass
 
-class UWUTokenizerError(Exception):
+class UWUTokenizerError(UWUError):
     def __init__(self, msg: str, tokenizer) -> None:
         composed_msg = f'at char {tokenizer._char} [{tokenizer._line}:{tokenizer._col}] '
         if tokenizer.source_name is not None:
@@ -13,3 +13,14 @@ class UWUTokenizerError(Exception):
         composed_msg += msg
         super().__init__(composed_msg)
         self.tokenizer = tokenizer
+
+    def __reduce__(self):
+        # The tokenizer cannot be pickled, errors sent from another
+        # process only keep their message.
+        return (_tokenizer_error, (str(self),))
+
+def _tokenizer_error(msg: str) -> UWUTokenizerError:
+    e = UWUTokenizerError.__new__(UWUTokenizerError)
+    Exception.__init__(e, msg)
+    e.tokenizer = None
+    return e
@@ -0,0 +1,188 @@
+import io
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from tokenizer import get_engine
+from uwu_parser import StreamParser, PLIndentifier
+from uwu_token_stream import TokenStream
+from uwu_pass import Pass, PLDecl, PLStx
+from uwu_emitter import Emitter
+from uwu_resolve import Resolver
+from uwu_types import TypeInference
+
+@dataclass
+class LineResult:
+    text: str
+    tokens: TokenStream
+    node: Any
+    # Where the line starts in the source, its tokens are placed there.
+    line: int = 0
+    offset: int = 0
+    declares: frozenset = field(default_factory = frozenset)
+    uses: frozenset = field(default_factory = frozenset)
+    output: Optional[str] = None
+    # Inferred types of the variables used, and whether the line widens
+    # the type of its SUM target. Only kept for backends with INFER_TYPES.
+    types: tuple = ()
+    widens: bool = False
+
+class IncrementalCompiler:
+    """
+    Front end that keeps the tokens, tree and emitted code of every line,
+    so an edit only re-runs Tokenizer, Parser and Pass on the lines it
+    touches.
+
+    Lines are tokenized on their own at their place in the source, and
+    the tokens of later lines are moved when an edit adds or removes
+    text, so errors point where a full compile would.
+
+    Emitted code of untouched lines is reused, except for lines using a
+    variable whose declaration was edited. Declarations are always
+    replayed through the backend, since they build its state. Lines
+    using a variable whose mangled name changed are emitted again. With
+    a backend inferring types, so are lines whose inferred types
+    changed, and lines widening a variable are always replayed.
+    """
+    def __init__(self, compiler_cls, source: str = '', source_name: Optional[str] = None, source_path: Optional[str] = None, engine: str = 'bulk') -> None:
+        self.compiler_cls = compiler_cls
+        self.source_name = source_name
+        self.source_path = source_path
+        self.tokenizer_cls = get_engine(engine)
+
+        self.lines = self.compile_lines(source, 0, 0)
+        self._output = None
+        self._mangled = {}
+
+    def compile_line(self, text: str, line: int = 0, offset: int = 0) -> LineResult:
+        tknzr = self.tokenizer_cls(
+            self.tokenizer_cls.wrap_source(text + '\n'), source_name = self.source_name, source_path = self.source_path,
+            line = line, offset = offset
+        )
+        tokens = TokenStream.from_tokenizer(tknzr)
+        nodes = list(Pass(consume = True).lower(StreamParser(tokens).statements()))
+        if not nodes:
+            return LineResult(text = text, tokens = tokens, node = None, line = line, offset = offset)
+
+        node, = nodes
+        if isinstance(node, PLDecl):
+            return LineResult(text = text, tokens = tokens, node = node, line = line, offset = offset, declares = frozenset([node.variable.id]))
+        uses = frozenset(x.id for x in node.arguments if isinstance(x, PLIndentifier))
+        return LineResult(text = text, tokens = tokens, node = node, line = line, offset = offset, uses = uses)
+
+    def compile_lines(self, text: str, line: int, offset: int) -> list:
+        t = []
+        for x in text.split('\n'):
+            t.append(self.compile_line(x, line, offset))
+            line += 1
+            offset += len(x) + 1
+        return t
+
+    def line_offset(self, i: int) -> int:
+        """
+        Offset in the source where line i starts.
+        """
+        if i < len(self.lines):
+            return self.lines[i].offset
+        if not self.lines:
+            return 0
+        last = self.lines[-1]
+        return last.offset + len(last.text) + 1
+
+    @property
+    def source(self) -> str:
+        return '\n'.join(x.text for x in self.lines)
+
+    def edit(self, start: int, end: int, text: str) -> str:
+        """
+        Replace lines [start, end) with text and return the new output.
+        Nothing changes if the new lines do not parse; backend errors are
+        raised after the edit is applied.
+        """
+        new = self.compile_lines(text, start, self.line_offset(start))
+        old = self.lines[start:end]
+
+        changed = set()
+        for r in old + new:
+            changed |= r.declares
+
+        lines = len(new) - len(old)
+        chars = len(text) - sum(len(r.text) + 1 for r in old) + 1
+        self.lines[start:end] = new
+        if lines or chars:
+            for r in self.lines[start + len(new):]:
+                r.line += lines
+                r.offset += chars
+                r.tokens.shift(lines, chars)
+        if changed:
+            for r in self.lines:
+                if r.uses & changed:
+                    r.output = None
+        self._output = None
+        return self.output()
+
+    def capture(self, compiler, f, *args) -> str:
+        buf = io.StringIO()
+        compiler.o = Emitter(buf)
+        f(*args)
+        compiler.o.flush()
+        return buf.getvalue()
+
+    def output(self) -> str:
+        if self._output is not None:
+            return self._output
+
+        compiler = self.compiler_cls(None, None)
+        resolver = Resolver(compiler.symbols)
+        for r in self.lines:
+            if r.node is not None:
+                resolver.dispatch(r.node)
+        resolver.check()
+
+        mangler = getattr(compiler, 'mangler', None)
+        if mangler is not None:
+            mangled = {x: mangler.mangle(x) for x in compiler.symbols.names}
+            changed = {x for x, y in self._mangled.items() if mangled.get(x, y) != y}
+            if changed:
+                for r in self.lines:
+                    if r.uses & changed:
+                        r.output = None
+            self._mangled = mangled
+
+        if getattr(compiler, 'INFER_TYPES', False):
+            self.infer_types()
+
+        parts = [self.capture(compiler, compiler.begin)]
+        for r in self.lines:
+            if r.node is None:
+                continue
+            if r.output is None or r.declares or r.widens:
+                r.output = self.capture(compiler, r.node.visit, compiler)
+            parts.append(r.output)
+        parts.append(self.capture(compiler, compiler.end))
+
+        self._output = ''.join(parts)
+        return self._output
+
+    def infer_types(self) -> None:
+        """
+        Run TypeInference over the resolved lines, dropping the output
+        of lines whose types or widening changed.
+        """
+        inference = TypeInference()
+        for r in self.lines:
+            if r.node is None:
+                continue
+            node = r.node
+            target = None
+            if isinstance(node, PLStx) and node.arguments and isinstance(node.arguments[0], PLIndentifier):
+                target = node.arguments[0]._who
+            before = inference.types[target] if target is not None and target < len(inference.types) else None
+            inference.dispatch(node)
+
+            types = tuple(x._type for x in node.arguments if isinstance(x, PLIndentifier)) if not isinstance(node, PLDecl) else ()
+            widens = target is not None and target < len(inference.types) and inference.types[target] != before
+            if types != r.types or widens != r.widens:
+                r.output = None
+                r.types = types
+                r.widens = widens
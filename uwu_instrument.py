@@ -0,0 +1,196 @@
+import time
+
+from contextlib import contextmanager, nullcontext
+
+from tokenizer import Tokenizer, TokenType
+
+STAGES = ('cache', 'tokenizer', 'parser', 'pass', 'optimizer', 'backend', 'cc', 'native', 'vm')
+
+class Timings:
+    """
+    Collects the wall time of every compiler stage, token and node
+    counts and, with memory = True, the tracemalloc peak.
+
+    Stages nest, as they do when compiling one statement at a time: the
+    parser pulls tokens while the backend pulls statements. The time of
+    a stage only counts while no inner stage runs, so the stages add up
+    to the time spent inside any of them.
+
+        timings = Timings()
+        with timings:
+            compile_stream(tokenizer, PythonCompiler, o, timings = timings)
+        print(timings.format_report())
+
+    Functions taking a timings argument default to NULL_TIMINGS, which
+    does not wrap anything.
+    """
+    def __init__(self, memory: bool = True) -> None:
+        self.memory = memory
+        self.seconds = {}
+        self.counts = {}
+        self.total = 0.0
+        self.peak_bytes = None
+
+        self._stack = []
+        self._mark = 0.0
+        self._start = 0.0
+        self._traced = False
+
+    def __enter__(self) -> 'Timings':
+        if self.memory:
+            import tracemalloc
+            self._traced = not tracemalloc.is_tracing()
+            if self._traced:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.total += time.perf_counter() - self._start
+        if self.memory:
+            import tracemalloc
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._traced:
+                tracemalloc.stop()
+
+    def _enter(self, name: str) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            top = self._stack[-1]
+            self.seconds[top] = self.seconds.get(top, 0.0) + now - self._mark
+        self._stack.append(name)
+        self._mark = now
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        name = self._stack.pop()
+        self.seconds[name] = self.seconds.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def tokenizer(self, tokenizer: Tokenizer) -> Tokenizer:
+        """
+        Time and count the tokens handed out by tokenizer. Returns
+        tokenizer itself.
+        """
+        next_token = tokenizer.next
+        enter, exit = self._enter, self._exit
+        counts = self.counts
+        counts.setdefault('tokens', 0)
+
+        def timed_next():
+            enter('tokenizer')
+            try:
+                t = next_token()
+            finally:
+                exit()
+            if t.type != TokenType.EOF:
+                counts['tokens'] += 1
+            return t
+        tokenizer.next = timed_next
+        return tokenizer
+
+    def statements(self, statements):
+        """
+        Time a generator of parsed statements, counting their nodes.
+        """
+        return self._timed('parser', statements, self._count_nodes)
+
+    def lowered(self, nodes):
+        """
+        Time a generator of lowered statements, such as Pass.lower.
+        """
+        return self._timed('pass', nodes, None)
+
+    def _timed(self, name: str, it, f):
+        it = iter(it)
+        while True:
+            self._enter(name)
+            try:
+                x = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            if f is not None:
+                f(x)
+            yield x
+
+    def _count_nodes(self, t_list) -> None:
+        self.counts['statements'] = self.counts.get('statements', 0) + 1
+        self.counts['nodes'] = self.counts.get('nodes', 0) + 1 + len(t_list.children)
+
+    def count_tree(self, root) -> None:
+        for x in root.children:
+            self._count_nodes(x)
+
+    def format_report(self) -> str:
+        t = []
+        staged = sum(self.seconds.values())
+        for name in sorted(self.seconds, key = lambda x: STAGES.index(x) if x in STAGES else len(STAGES)):
+            seconds = self.seconds[name]
+            share = 100 * seconds / self.total if self.total else 0
+            t.append(f'{name:<12} {seconds * 1000:10.3f} ms {share:5.1f}%')
+        t.append(f'{"other":<12} {max(self.total - staged, 0) * 1000:10.3f} ms')
+        t.append(f'{"total":<12} {self.total * 1000:10.3f} ms')
+        for name, n in self.counts.items():
+            t.append(f'{name:<12} {n:>10}')
+        if self.peak_bytes is not None:
+            t.append(f'{"peak memory":<12} {self.peak_bytes / 2 ** 20:10.3f} MiB')
+        return '\n'.join(t)
+
+class _NullTimings:
+    """
+    Timings that record nothing. Every hook returns its argument.
+    """
+    def __enter__(self) -> '_NullTimings':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def tokenizer(self, tokenizer: Tokenizer) -> Tokenizer:
+        return tokenizer
+
+    def statements(self, statements):
+        return statements
+
+    def lowered(self, nodes):
+        return nodes
+
+    def count_tree(self, root) -> None:
+        pass
+
+NULL_TIMINGS = _NullTimings()
+
+@contextmanager
+def profile(path: str):
+    """
+    Profile the block with cProfile and write the pstats file to path.
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,98 @@
+import keyword
+
+ESCAPES = {
+    '@': '_at_',
+    '!': '_bang_',
+    '.': '_dot_',
+    '/': '_slash_',
+    '\\': '_bslash_',
+    '~': '_tilde_',
+    ':': '_colon_',
+}
+
+_ESCAPE_TABLE = str.maketrans(ESCAPES)
+
+# Every name Python rejects as an assignment target, and print, which
+# the generated program calls.
+PYTHON_RESERVED = frozenset(keyword.kwlist + keyword.softkwlist + ['__debug__', 'print'])
+
+C_RESERVED = frozenset([
+    'auto', 'break', 'case', 'char', 'const', 'continue', 'default', 'do',
+    'double', 'else', 'enum', 'extern', 'float', 'for', 'goto', 'if',
+    'inline', 'int', 'long', 'register', 'restrict', 'return', 'short',
+    'signed', 'sizeof', 'static', 'struct', 'switch', 'typedef', 'union',
+    'unsigned', 'void', 'volatile', 'while', '_Alignas', '_Alignof',
+    '_Atomic', '_Bool', '_Complex', '_Generic', '_Imaginary', '_Noreturn',
+    '_Static_assert', '_Thread_local',
+    # Names the generated program itself uses.
+    'main', 'argc', 'argv', 'printf', 'uwu_repr',
+    # Macros of the headers it includes, which would replace a variable
+    # of the same name: float.h, stdio.h, stdlib.h and string.h, with
+    # the extra ones glibc defines, and the ones gcc predefines.
+    'DECIMAL_DIG', 'FLT_RADIX', 'FLT_ROUNDS', 'FLT_EVAL_METHOD',
+    *(f'{t}_{x}' for t in ('FLT', 'DBL', 'LDBL') for x in (
+        'MANT_DIG', 'DIG', 'DECIMAL_DIG', 'HAS_SUBNORM', 'MIN_EXP', 'MIN_10_EXP',
+        'MAX_EXP', 'MAX_10_EXP', 'MAX', 'MIN', 'EPSILON', 'TRUE_MIN',
+    )),
+    'NULL', 'EOF', 'BUFSIZ', 'FILENAME_MAX', 'FOPEN_MAX', 'L_tmpnam', 'TMP_MAX',
+    'SEEK_SET', 'SEEK_CUR', 'SEEK_END', '_IOFBF', '_IOLBF', '_IONBF',
+    'stdin', 'stdout', 'stderr', 'EXIT_SUCCESS', 'EXIT_FAILURE', 'RAND_MAX', 'MB_CUR_MAX',
+    'L_ctermid', 'P_tmpdir', 'BIG_ENDIAN', 'LITTLE_ENDIAN', 'PDP_ENDIAN', 'BYTE_ORDER',
+    'FD_SETSIZE', 'NFDBITS', 'WNOHANG', 'WUNTRACED', 'WSTOPPED', 'WEXITED',
+    'WCONTINUED', 'WNOWAIT', 'linux', 'unix',
+])
+
+class Mangler:
+    """
+    Maps UWU identifiers to names that are valid in the target language,
+    escaping the characters in ESCAPES in a single str.translate.
+
+    A name that clashes with a reserved word or with the name given to
+    an earlier identifier gets the first free _1, _2, ... suffix, so the
+    result only depends on the order identifiers are first seen. Every
+    name is mangled once per Mangler; unmangle maps back.
+    """
+    def __init__(self, reserved: frozenset = frozenset()) -> None:
+        self.reserved = reserved
+        self._names = {}
+        self._originals = {}
+
+    def mangle(self, name: str) -> str:
+        safe = self._names.get(name)
+        if safe is not None:
+            return safe
+        return self._add(name, name.translate(_ESCAPE_TABLE))
+
+    def derived(self, name: str, suffix: str) -> str:
+        """
+        A second name for the identifier name, like the mangled name
+        followed by _suffix. It never clashes with other names.
+        """
+        key = (name, suffix)
+        safe = self._names.get(key)
+        if safe is not None:
+            return safe
+        return self._add(key, f'{self.mangle(name)}_{suffix}')
+
+    def _add(self, key, safe: str) -> str:
+        if safe in self.reserved or safe in self._originals:
+            i = 1
+            while f'{safe}_{i}' in self.reserved or f'{safe}_{i}' in self._originals:
+                i += 1
+            safe = f'{safe}_{i}'
+        self._names[key] = safe
+        self._originals[safe] = key if isinstance(key, str) else key[0]
+        return safe
+
+    def unmangle(self, safe: str) -> str:
+        name = self._originals.get(safe)
+        if name is None:
+            raise KeyError(f"Name was not mangled here. {safe}")
+        return name
+
+    def mapping(self) -> dict:
+        """
+        Every identifier mangled so far and its name, in order. Derived
+        names are keyed by (identifier, suffix).
+        """
+        return dict(self._names)
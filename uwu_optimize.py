@@ -0,0 +1,230 @@
+import time
+
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from uwu_parser import TreeRoot, PLNumber, PLIndentifier
+from uwu_pass import PLCall, PLDecl, PLStx
+
+class Values:
+    """
+    Value of every variable while walking the statements in order.
+    Programs have no control flow, so after a declaration the value of
+    a variable is always known. SUM follows Python, which CCompiler
+    matches by widening its variables.
+    """
+    def __init__(self) -> None:
+        self.known = {}
+
+    def get(self, arg) -> Optional[Any]:
+        if isinstance(arg, PLNumber):
+            return arg.value
+        if isinstance(arg, PLIndentifier):
+            return self.known.get(arg.id)
+        return None
+
+    def step(self, node) -> None:
+        if isinstance(node, PLDecl):
+            v = DECL_VALUES.get(node.type)
+            if v is None:
+                self.known.pop(node.variable.id, None)
+            else:
+                self.known[node.variable.id] = v
+        elif is_sum(node):
+            iden, val = node.arguments
+            current = self.known.get(iden.id)
+            value = self.get(val)
+            if current is None or value is None:
+                self.known.pop(iden.id, None)
+            else:
+                try:
+                    self.known[iden.id] = current + value
+                except OverflowError:
+                    # A float and an int past any double, left to the program.
+                    self.known.pop(iden.id, None)
+
+DECL_VALUES = {
+    'INT': 0,
+}
+
+def is_sum(node) -> bool:
+    return (
+        isinstance(node, PLStx) and node.name == 'SUM' and len(node.arguments) == 2
+        and isinstance(node.arguments[0], PLIndentifier)
+    )
+
+def is_print(node) -> bool:
+    return isinstance(node, PLCall) and isinstance(node.callee, PLIndentifier) and node.callee.id == 'UwU'
+
+def constant(value, arg) -> PLNumber:
+    return PLNumber(value = value, token = arg.token)
+
+class OptPass:
+    name = 'pass'
+
+    def run(self, children: list) -> list:
+        raise NotImplementedError
+
+class ConstantFolding(OptPass):
+    """
+    Replace variables added by a SUM with their known value.
+    """
+    name = 'constant-folding'
+
+    def run(self, children: list) -> list:
+        values = Values()
+        t = []
+        for node in children:
+            if is_sum(node):
+                iden, val = node.arguments
+                v = values.get(val)
+                if isinstance(val, PLIndentifier) and v is not None:
+                    node = replace(node, arguments = [iden, constant(v, val)])
+            values.step(node)
+            t.append(node)
+        return t
+
+class ConstantPrints(OptPass):
+    """
+    Print the known value of a variable instead of reading it.
+    """
+    name = 'constant-prints'
+
+    def run(self, children: list) -> list:
+        values = Values()
+        t = []
+        for node in children:
+            if is_print(node):
+                args = []
+                for x in node.arguments:
+                    v = values.get(x)
+                    args.append(constant(v, x) if isinstance(x, PLIndentifier) and v is not None else x)
+                node = replace(node, arguments = args)
+            values.step(node)
+            t.append(node)
+        return t
+
+class MergeSums(OptPass):
+    """
+    Merge consecutive SUMs of constants on the same variable, when the
+    merged SUM gives exactly the same value.
+    """
+    name = 'merge-sums'
+
+    def mergeable(self, last, node) -> bool:
+        return (
+            is_sum(last) and is_sum(node)
+            and last.arguments[0].id == node.arguments[0].id
+            and isinstance(last.arguments[1], PLNumber)
+            and isinstance(node.arguments[1], PLNumber)
+        )
+
+    def run(self, children: list) -> list:
+        values = Values()
+        t = []
+        # Value of the variable t[-1] adds to, before t[-1] runs.
+        before_last = None
+        for node in children:
+            current = values.known.get(node.arguments[0].id) if is_sum(node) else None
+            values.step(node)
+            if t and self.mergeable(t[-1], node):
+                last = t[-1]
+                after = values.known.get(node.arguments[0].id)
+                try:
+                    merged = last.arguments[1].value + node.arguments[1].value
+                    exact = before_last is not None and after is not None and before_last + merged == after
+                except OverflowError:
+                    exact = False
+                if exact:
+                    t[-1] = replace(last, arguments = [last.arguments[0], constant(merged, last.arguments[1])])
+                    continue
+            before_last = current
+            t.append(node)
+        return t
+
+class DeadStores(OptPass):
+    """
+    Drop SUMs whose result is never read and declarations of variables
+    that are never read. SUMs reading or writing a variable that is not
+    declared yet are kept, so their errors still happen.
+    """
+    name = 'dead-stores'
+
+    def declared_sum(self, node, declared: set) -> bool:
+        if not is_sum(node):
+            return False
+        iden, val = node.arguments
+        return iden.id in declared and (not isinstance(val, PLIndentifier) or val.id in declared)
+
+    def run(self, children: list) -> list:
+        declared = set()
+        safe = []
+        for node in children:
+            if isinstance(node, PLDecl):
+                declared.add(node.variable.id)
+            safe.append(self.declared_sum(node, declared))
+
+        live = set()
+        t = []
+        for node, is_safe in zip(reversed(children), reversed(safe)):
+            if isinstance(node, PLDecl):
+                if node.variable.id not in live:
+                    continue
+                live.discard(node.variable.id)
+            elif is_sum(node):
+                iden, val = node.arguments
+                if is_safe and iden.id not in live:
+                    continue
+                live.add(iden.id)
+                if isinstance(val, PLIndentifier):
+                    live.add(val.id)
+            else:
+                for x in getattr(node, 'arguments', []):
+                    if isinstance(x, PLIndentifier):
+                        live.add(x.id)
+            t.append(node)
+        t.reverse()
+        return t
+
+@dataclass
+class PassReport:
+    name: str
+    seconds: float
+    before: int
+    after: int
+
+class Optimizer:
+    """
+    Runs optimization passes over the tree returned by Pass.do_pass,
+    before it reaches a backend.
+    """
+    LEVELS = {
+        0: [],
+        1: [ConstantFolding, MergeSums],
+        2: [ConstantFolding, ConstantPrints, DeadStores, MergeSums],
+    }
+
+    def __init__(self, level: int = 1) -> None:
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown optimization level. {level}")
+        self.passes = [x() for x in self.LEVELS[level]]
+        self.report = []
+
+    def optimize(self, root: TreeRoot) -> TreeRoot:
+        children = root.children
+        for p in self.passes:
+            start = time.perf_counter()
+            before = len(children)
+            children = p.run(children)
+            self.report.append(PassReport(p.name, time.perf_counter() - start, before, len(children)))
+        return TreeRoot(children = children)
+
+    def format_report(self) -> str:
+        t = []
+        for r in self.report:
+            t.append(f'{r.name:<18} {r.seconds * 1000:9.3f} ms {r.before:>9} -> {r.after:<9}')
+        if self.report:
+            first, last = self.report[0].before, self.report[-1].after
+            removed = 100 * (first - last) / first if first else 0
+            t.append(f'{"total":<18} {sum(r.seconds for r in self.report) * 1000:9.3f} ms {first:>9} -> {last:<9} ({removed:.1f}% fewer statements)')
+        return '\n'.join(t)
@@ -0,0 +1,211 @@
+import gc
+import mmap
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from tokenizer import Token, TokenType, OffsetToken, OffsetTokenizer, LineIndex, get_engine
+from uwu_source import decode_blocks, read_chunks
+from uwu_parser import Parser, TreeRoot, PLIndentifier, PLNumber
+from uwu_pass import Pass, PLCall, PLDecl, PLStx
+from uwu_instrument import Timings, NULL_TIMINGS
+
+MIN_CHUNK_SIZE = 1 << 20
+CHUNKS_PER_JOB = 4
+
+_DECL = 0
+_CALL = 1
+_STX = 2
+
+def split_lines(path: str, n: int, min_size: int = MIN_CHUNK_SIZE) -> list:
+    """
+    Split path into about n (start, end) byte ranges of at least
+    min_size bytes. Every range but the last ends right after a newline,
+    so it holds whole statements.
+    """
+    size = os.path.getsize(path)
+    step = max(-(-size // max(n, 1)), min_size, 1)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + step
+            if end >= size:
+                end = size
+            else:
+                f.seek(end - 1)
+                end += len(f.readline()) - 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _read(path: str, start: int, end: int, use_mmap: bool = False) -> str:
+    with open(path, 'rb') as f:
+        if use_mmap and end > start:
+            with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as m:
+                b = m[start:end]
+        else:
+            f.seek(start)
+            b = f.read(end - start)
+    # Same decoding as read_chunks. A range never splits a character
+    # or a '\r\n' pair.
+    return ''.join(decode_blocks([b]))
+
+def _measure(job: tuple) -> tuple:
+    """
+    Lines and characters of a range, once decoded.
+    """
+    text = _read(*job)
+    return text.count('\n'), len(text)
+
+def _parse(job: tuple) -> tuple:
+    """
+    Parse and lower one range. Returns (statements, line starts, parse
+    error, pass error), errors are returned rather than raised so the
+    caller can pick the one the serial front end would have raised. Line
+    starts are only sent for OffsetTokenizer.
+    """
+    path, start, end, use_mmap, line, offset, engine, source_name = job
+    tokenizer_cls = get_engine(engine)
+    tokenizer = tokenizer_cls(
+        tokenizer_cls.wrap_source(_read(path, start, end, use_mmap)),
+        source_name = source_name, source_path = path, line = line, offset = offset
+    )
+    try:
+        tree = Parser(tokenizer).parse()
+    except Exception as e:
+        return None, None, e, None
+    try:
+        Pass(tree, consume = True).do_pass()
+    except Exception as e:
+        return None, None, None, e
+    if isinstance(tokenizer, OffsetTokenizer):
+        return _pack(tree.children, True), tokenizer.index.starts, None, None
+    return _pack(tree.children, False), None, None, None
+
+def _pack(statements: list, offsets: bool) -> list:
+    """
+    Flatten lowered statements to tuples, which pickle and unpickle much
+    faster than the nodes. Every statement is a (kind, name, number of
+    leaves) tuple followed by one (is identifier, value, line, col, n,
+    span) tuple per leaf. With offsets, line and col are left out.
+    """
+    t = []
+    append = t.append
+    for x in statements:
+        kind = type(x)
+        if kind is PLDecl:
+            leaves = [x.variable]
+            append((_DECL, x.type, 1))
+        elif kind is PLCall:
+            leaves = [x.callee, *x.arguments]
+            append((_CALL, None, len(leaves)))
+        elif kind is PLStx:
+            leaves = x.arguments
+            append((_STX, x.name, len(leaves)))
+        else:
+            raise RuntimeError(f"Unknown statement. {x}")
+        for leaf in leaves:
+            token = leaf.token
+            if offsets:
+                append((type(leaf) is PLIndentifier, token.value, None, None, token.n, token.span))
+            else:
+                append((type(leaf) is PLIndentifier, token.value, token.line, token.col, token.n, token.span))
+    return t
+
+def _unpack(packed: list, source_name: str, source_path: str, index: Optional[LineIndex]) -> list:
+    """
+    Rebuild the statements of _pack, with OffsetTokens over index when
+    it is given.
+    """
+    statements = []
+    append = statements.append
+    name_type = TokenType.NAME
+    number_type = TokenType.NUMBER
+    i = 0
+    size = len(packed)
+    while i < size:
+        kind, name, n = packed[i]
+        leaves = []
+        for is_id, value, line, col, offset, span in packed[i + 1:i + 1 + n]:
+            token_type = name_type if is_id else number_type
+            if index is None:
+                token = Token(line, col, offset, span, source_name, source_path, token_type, value)
+            else:
+                token = OffsetToken(offset, span, token_type, value, index)
+            leaves.append(PLIndentifier(value, token) if is_id else PLNumber(value, token))
+        i += 1 + n
+        if kind == _DECL:
+            append(PLDecl(name, leaves[0]))
+        elif kind == _CALL:
+            append(PLCall(leaves[0], leaves[1:]))
+        else:
+            append(PLStx(name, leaves))
+    return statements
+
+def parse_file(path: str, jobs: Optional[int] = None, engine: str = 'bulk', source_name: Optional[str] = None, min_chunk_size: int = MIN_CHUNK_SIZE, use_mmap: bool = False, timings: Timings = NULL_TIMINGS) -> TreeRoot:
+    """
+    Parse and lower path in a pool of jobs processes, one line aligned
+    range at a time. Returns the same tree, token positions included,
+    as Pass(Parser(tokenizer).parse(), consume = True).do_pass() and
+    raises the same error it would.
+
+    Files smaller than min_chunk_size are parsed in this process. With
+    use_mmap, the file is read through mmap like read_chunks does.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if source_name is None:
+        source_name = os.path.basename(path)
+    with timings.stage('parser'):
+        ranges = split_lines(path, jobs * CHUNKS_PER_JOB, min_chunk_size)
+        if jobs == 1 or len(ranges) <= 1:
+            tokenizer_cls = get_engine(engine)
+            tokenizer = tokenizer_cls(tokenizer_cls.wrap_chunks(read_chunks(path, use_mmap = use_mmap)), source_name = source_name, source_path = path)
+            root = Pass(Parser(tokenizer).parse(), consume = True).do_pass()
+        else:
+            with ProcessPoolExecutor(max_workers = min(jobs, len(ranges))) as executor:
+                root = TreeRoot(_parse_ranges(executor, path, ranges, engine, source_name, use_mmap))
+    timings.count_tree(root)
+    return root
+
+def _parse_ranges(executor: ProcessPoolExecutor, path: str, ranges: list, engine: str, source_name: str, use_mmap: bool) -> list:
+    # Where a range starts in lines and characters is only known once
+    # the ranges before it are decoded.
+    sizes = executor.map(_measure, [(path, start, end, use_mmap) for start, end in ranges])
+    jobs = []
+    line = offset = 0
+    for (start, end), (lines, chars) in zip(ranges, sizes):
+        jobs.append((path, start, end, use_mmap, line, offset, engine, source_name))
+        line += lines
+        offset += chars
+    results = list(executor.map(_parse, jobs))
+
+    # A parse error anywhere comes first, the serial front end parses
+    # the whole file before lowering it.
+    for _, _, parse_error, _ in results:
+        if parse_error is not None:
+            raise parse_error
+    for _, _, _, pass_error in results:
+        if pass_error is not None:
+            raise pass_error
+
+    index = None
+    if results[0][1] is not None:
+        # Every range starts with the line the one before it ended with.
+        index = LineIndex(source_name, path)
+        for _, starts, _, _ in results:
+            index.starts.extend(starts[1:])
+
+    # Building the nodes only allocates, collections in the meantime
+    # would not free anything.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        statements = []
+        for packed, _, _, _ in results:
+            statements.extend(_unpack(packed, source_name, path, index))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return statements
@@ -1,22 +1,22 @@
 from typing import Optional, Union, Any
 
 from tokenizer import TokenType, Tokenizer, Token
+from uwu_token_stream import TokenStream
 from dataclasses import dataclass
 
+from uwu_visitor import node
+
+@node('visit_root')
 @dataclass
 class TreeRoot:
     children: list
 
-    def visit(self, visitor):
-        return visitor.visit_root(self)
-
+@node('visit_t_list')
 @dataclass
 class TList:
     children: list
 
-    def visit(self, visitor):
-        return visitor.visit_t_list(self)
-
+@node('visit_identifier')
 @dataclass
 class PLIndentifier:
     id: str
@@ -24,17 +24,12 @@ class PLIndentifier:
     _who: int = -1
     _type: int = -1
 
-    def visit(self, visitor):
-        return visitor.visit_identifier(self)
-
+@node('visit_number')
 @dataclass
 class PLNumber:
-    value: float
+    value: Union[int, float]
     token: Token
 
-    def visit(self, visitor):
-        return visitor.visit_number(self)
-
 class _Skip:
     pass
 Skip = _Skip()
@@ -64,18 +59,22 @@ class Parser:
         return self._last
 
     def parse(self):
-        children = []
+        return TreeRoot(list(self.statements()))
+
+    def statements(self):
+        """
+        Yield one TList per line, parsing lazily as they are consumed.
+        """
         while True:
             child = self._parse()
             if child is not Skip and child is not EOF:
-                children.append(child)
+                yield child
             elif child is EOF:
                 break
             elif child is Skip:
                 pass
             else:
                 raise RuntimeError(f"Unknown value returned by _parse. {child}")
-        return TreeRoot(children)
     
 
     def try_match(self, *types: list[TokenType]) -> bool:
@@ -99,10 +98,13 @@ class Parser:
             return PLNumber(value = t.value, token = t)
         raise RuntimeError(f"Unknown token evaluated in name expression.")
 
+    def last_eval(self) -> Any:
+        return self.name_eval(self.last)
+
     def name_parse(self) -> TList:
-        t = [self.name_eval(self.last)]
+        t = [self.last_eval()]
         while self.try_match(TokenType.NAME, TokenType.NUMBER, TokenType.TYPE):
-            t.append(self.name_eval(self.last))
+            t.append(self.last_eval())
         self.match(TokenType.NL, 'Expected new line character after sequence of expressions.')
         return TList(t)
 
@@ -119,3 +121,49 @@ class Parser:
                
         raise RuntimeError(f"Unknown sequence of tokens.")
 
+
+class StreamParser(Parser):
+    """
+    Parser over a TokenStream. Kinds and values are read straight from
+    the stream arrays and the tree holds TokenRefs, so no Token object
+    is built unless something asks for one.
+    """
+    def __init__(self, stream: TokenStream) -> None:
+        self.stream = stream
+        self._pos = -1
+        self._end = len(stream) - 1
+        self.read_next()
+
+    def read_next(self) -> None:
+        # The stream ends with EOF, which is read over and over like
+        # Tokenizer.next does.
+        if self._pos < self._end:
+            self._pos += 1
+
+    @property
+    def current(self) -> Token:
+        return self.stream.token(self._pos)
+
+    @property
+    def last(self) -> Optional[Token]:
+        if self._pos < 1:
+            return None
+        return self.stream.token(self._pos - 1)
+
+    def try_match(self, *types: list[TokenType]) -> bool:
+        kind = self.stream.kinds[self._pos]
+        for type in types:
+            if kind == type.value:
+                self.read_next()
+                return True
+        return False
+
+    def last_eval(self) -> Any:
+        stream = self.stream
+        i = self._pos - 1
+        kind = stream.kinds[i]
+        if kind == TokenType.NAME.value:
+            return PLIndentifier(id = stream.value(i), token = stream.ref(i))
+        if kind == TokenType.NUMBER.value:
+            return PLNumber(value = stream.value(i), token = stream.ref(i))
+        raise RuntimeError(f"Unknown token evaluated in name expression.")
@@ -1,48 +1,71 @@
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 from dataclasses import dataclass, replace
 
 from uwu_parser import TreeRoot, TList, PLIndentifier, PLNumber
+from uwu_visitor import Visitor, node
 
+@node('visit_call')
 @dataclass
 class PLCall:
     callee: Any
     arguments: list[Any]
 
-    def visit(self, visitor):
-        return visitor.visit_call(self)
-
+@node('visit_decl')
 @dataclass
 class PLDecl:
     type: str
     variable: PLIndentifier
 
-    def visit(self, visitor):
-        return visitor.visit_decl(self)
-
+@node('visit_stx')
 @dataclass
 class PLStx:
     name: str
     arguments: list[Any]
 
-    def visit(self, visitor):
-        return visitor.visit_stx(self)
+class Pass(Visitor):
+    """
+    Lowers the TLists built by Parser to PLCall, PLDecl and PLStx.
+
+    By default the input is left untouched: do_pass returns a new tree
+    and the leaves of calls are copied.
 
-class Pass:
-    def __init__(self, root: TreeRoot) -> None:
+    With consume = True the input is consumed instead, so lowering does
+    not copy anything: do_pass rewrites root.children in place and
+    returns root itself, the children list of every TList becomes the
+    argument list of its statement and leaves are shared. The parse
+    tree, and any TList given to lower, must not be used afterwards,
+    even if lowering raised.
+    """
+    def __init__(self, root: Optional[TreeRoot] = None, consume: bool = False) -> None:
         self.root = root
+        self.consume = consume
     
     def do_pass(self) -> TreeRoot:
-        return self.root.visit(self)
+        return self.dispatch(self.root)
+
+    def lower(self, t_lists) -> Any:
+        """
+        Lower statements one at a time, for callers that do not keep the
+        whole tree around. self.root is not used.
+        """
+        for t in t_lists:
+            yield self.dispatch(t)
     
     def visit_t_list(self, t: TList) -> Any:
-        callee, *args = t.children
+        if self.consume:
+            args = t.children
+            callee = args.pop(0)
+        else:
+            callee, *args = t.children
         
         if not isinstance(callee, PLIndentifier):
             raise RuntimeError(f"Start of expression is not a identifier. {callee}")
         
         if callee.id in self.CALL_IDENTIFIERS:
-            return PLCall(callee = callee, arguments = [x.visit(self) for x in args])
+            if not self.consume:
+                args = [self.dispatch(x) for x in args]
+            return PLCall(callee = callee, arguments = args)
         elif callee.id in self.DECL_IDENTIFIERS:
             if len(args) != 1:
                 raise RuntimeError(f"Declaration: syntax error. Expected just the identifier.")
@@ -55,21 +78,21 @@ class Pass:
         raise ValueError(f"This pass does not expect a TList that cannot become other stuff.")
     
     def visit_root(self, t: Any) -> Any:
-        return TreeRoot(children = [x.visit(self) for x in t.children])
+        if self.consume:
+            children = t.children
+            for i, x in enumerate(children):
+                children[i] = self.dispatch(x)
+            return t
+        return TreeRoot(children = [self.dispatch(x) for x in t.children])
     
     def _visit_others(self, t) -> Any:
+        if self.consume:
+            return t
         return replace(t)
     
     visit_number = _visit_others
     visit_identifier = _visit_others
 
-    def __getattr__(self, name):
-        if name.startswith('visit_'):
-            def f(t):
-                raise RuntimeError(f"Unknown syntax tree node. {t}")
-            return f
-        raise super().__getattribute__(name)
-
     CALL_IDENTIFIERS = {
         'UwU',
     }
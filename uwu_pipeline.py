@@ -0,0 +1,47 @@
+from typing import Optional
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser, TreeRoot
+from uwu_pass import Pass
+from uwu_optimize import Optimizer
+from uwu_instrument import Timings, NULL_TIMINGS
+
+def compile_tree(tokenizer: Tokenizer, compiler_cls, o, optimizer: Optional[Optimizer] = None, timings: Timings = NULL_TIMINGS):
+    """
+    Parse the whole program, lower it, optimize it if an optimizer is
+    given and then emit it. Returns the backend.
+    """
+    parser = Parser(timings.tokenizer(tokenizer))
+    with timings.stage('parser'):
+        tree_1 = parser.parse()
+    timings.count_tree(tree_1)
+    pass_1 = Pass(tree_1, consume = True)
+    with timings.stage('pass'):
+        t = pass_1.do_pass()
+    return compile_lowered(t, compiler_cls, o, optimizer, timings)
+
+def compile_lowered(t: TreeRoot, compiler_cls, o, optimizer: Optional[Optimizer] = None, timings: Timings = NULL_TIMINGS):
+    """
+    Optimize and emit a tree already lowered by Pass, such as the one
+    built by uwu_parallel.parse_file. Returns the backend.
+    """
+    if optimizer is not None:
+        with timings.stage('optimizer'):
+            t = optimizer.optimize(t)
+    compiler = compiler_cls(t, o)
+    with timings.stage('backend'):
+        compiler.compile()
+    return compiler
+
+def compile_stream(tokenizer: Tokenizer, compiler_cls, o, timings: Timings = NULL_TIMINGS):
+    """
+    Parse, lower and emit one statement at a time. Only the current
+    statement and the backend's own state (declared variables) are
+    alive at any point. Returns the backend.
+    """
+    parser = Parser(timings.tokenizer(tokenizer))
+    pass_1 = Pass(consume = True)
+    compiler = compiler_cls(None, o)
+    with timings.stage('backend'):
+        compiler.compile_stream(timings.lowered(pass_1.lower(timings.statements(parser.statements()))))
+    return compiler
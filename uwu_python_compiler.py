@@ -1,29 +1,60 @@
+import math
+
 
 from uwu_pass import PLCall, PLDecl, PLStx
 from uwu_parser import TreeRoot, PLNumber, PLIndentifier
+from uwu_visitor import Visitor
+from uwu_emitter import Emitter, DEFAULT_FLUSH_THRESHOLD
+from uwu_mangle import Mangler, PYTHON_RESERVED
+from uwu_resolve import Resolver, Symbols
 
-class PythonCompiler:
+class PythonCompiler(Visitor):
     EXT = '.py'
+    # Names a variable cannot take in the output.
+    RESERVED = PYTHON_RESERVED
+    # Emit the program as the body of a function, see FastLocalsPythonCompiler.
+    FAST_LOCALS = False
 
-    def __init__(self, t, o) -> None:
+    def __init__(self, t, o, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD) -> None:
         self.t = t
-        self.o = o
+        self.o = Emitter.wrap(o, flush_threshold)
+        self.indent = ''
+        self.symbols = Symbols()
+        self.mangler = Mangler(self.RESERVED)
+        self._names = []
     
     def compile(self) -> None:
-        self.t.visit(self)
+        Resolver(self.symbols).resolve(self.t)
+        self.begin()
+        self.dispatch(self.t)
+        self.end()
+        self.flush()
+
+    def compile_stream(self, nodes) -> None:
+        self.begin()
+        for node in Resolver(self.symbols).resolve_stream(nodes):
+            self.dispatch(node)
+        self.end()
+        self.flush()
+
+    def begin(self) -> None:
+        if self.FAST_LOCALS:
+            # print is bound as a default argument, so it is a local too.
+            self.o.writeln('def main(print = print):')
+            self.indent = '    '
+
+    def end(self) -> None:
+        if self.FAST_LOCALS:
+            self.o.writeln('    return')
+            self.indent = ''
+            self.o.writeln("\nif __name__ == '__main__':\n    main()")
 
     def write(self, s) -> None:
         self.o.write(s)
     def writeln(self, s) -> None:
-        self.o.write(s)
-        self.o.write('\n')
-
-    def __getattr__(self, name):
-        if name.startswith('visit_'):
-            def f(t):
-                raise RuntimeError(f"Unknown syntax tree node. {t}")
-            return f
-        raise super().__getattribute__(name)
+        self.o.writeln(self.indent + s)
+    def flush(self) -> None:
+        self.o.flush()
     
     CALL_NAMES = {
         'UwU': 'print',
@@ -33,7 +64,7 @@ class PythonCompiler:
         return self.CALL_NAMES[name]
     
     def format_args(self, args: list) -> str:
-        t = [x.visit(self) for x in args]
+        t = [self.dispatch(x) for x in args]
         return ', '.join(t)
 
     def visit_call(self, call: PLCall) -> None:
@@ -49,24 +80,28 @@ class PythonCompiler:
     
     def visit_root(self, root: TreeRoot) -> None:
         for child in root.children:
-            child.visit(self)
+            self.dispatch(child)
     
     def visit_number(self, n: PLNumber) -> str:
+        if n.value == math.inf:
+            # A decimal past any float, str gives a name.
+            return '1e999'
         return '{}'.format(n.value)
     
 
-    def make_name_safe(self, name: str) -> str:
-        name = name.replace('@', '_at_')
-        name = name.replace('!', '_bang_')
-        name = name.replace('.', '_dot_')
-        name = name.replace('/', '_slash_')
-        name = name.replace('\\', '_bslash_')
-        name = name.replace('~', '_tilde_')
-        name = name.replace(':', '_colon_')
-        return name
-    
+    def name(self, id: PLIndentifier) -> str:
+        """
+        Safe name of a resolved identifier, mangled once per slot.
+        """
+        try:
+            return self._names[id._who]
+        except IndexError:
+            names = self._names
+            names.extend(self.mangler.mangle(x) for x in self.symbols.names[len(names):])
+            return names[id._who]
+
     def visit_identifier(self, id: PLIndentifier) -> str:
-        return self.make_name_safe(id.id)
+        return self.name(id)
 
     def get_decl_initializer(self, name: str) -> str:
         v = self.DECL_INITIALIZER.get(name)
@@ -75,7 +110,7 @@ class PythonCompiler:
         return v
 
     def visit_decl(self, decl: PLDecl) -> None:
-        var = self.make_name_safe(decl.variable.id)
+        var = self.name(decl.variable)
         _type = decl.type
         initializer = self.get_decl_initializer(_type)
         self.writeln(f"{var} = {initializer}")
@@ -93,9 +128,18 @@ class PythonCompiler:
             iden, val = stx.arguments
             if not isinstance(iden, PLIndentifier):
                 raise RuntimeError(f"Expected identifier as first parameter in SUM syntax.")
-            val = val.visit(self)
-            var = self.make_name_safe(iden.id)
+            val = self.dispatch(val)
+            var = self.name(iden)
             self.writeln(f"{var} += {val}")
             return
         
         raise RuntimeError(f"Unknown syntax name. {name}")
+
+class FastLocalsPythonCompiler(PythonCompiler):
+    """
+    Emits the program as the body of a main function run under an
+    if __name__ == '__main__' guard. Variables are then function locals,
+    which CPython reads and writes by index instead of through the
+    module's dict.
+    """
+    FAST_LOCALS = True
@@ -0,0 +1,118 @@
+from typing import Optional
+
+from uwu_parser import TreeRoot, PLIndentifier, PLNumber
+from uwu_pass import PLCall, PLDecl, PLStx
+from uwu_visitor import Visitor
+from uwu_exception import UWUError
+
+# Numeric types, ordered so a wider type compares greater.
+TYPE_INT = 0
+TYPE_LONG = 1
+TYPE_DOUBLE = 2
+
+DECL_TYPES = {
+    'INT': TYPE_INT,
+}
+
+class Symbols:
+    """
+    Interned variables. A variable's slot is its index in names and
+    types; slots are dense and given in order of first declaration.
+    Declaring a name again reuses its slot.
+    """
+    def __init__(self) -> None:
+        self.names = []
+        self.types = []
+        self.slots = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def declare(self, name: str, type: int) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = len(self.names)
+            self.slots[name] = slot
+            self.names.append(name)
+            self.types.append(type)
+        else:
+            self.types[slot] = type
+        return slot
+
+class Resolver(Visitor):
+    """
+    Fills _who with the slot and _type with the type of every variable
+    identifier in the lowered tree. Callees are left alone.
+
+    Uses of variables not declared before them are collected, so check
+    reports all of them in a single UWUError.
+    """
+    def __init__(self, symbols: Optional[Symbols] = None) -> None:
+        self.symbols = Symbols() if symbols is None else symbols
+        self.errors = []
+
+    def resolve(self, root: TreeRoot) -> Symbols:
+        self.dispatch(root)
+        self.check()
+        return self.symbols
+
+    def resolve_stream(self, nodes):
+        """
+        Resolve statements one at a time, yielding them until the first
+        undeclared variable. The remaining statements are still resolved
+        so the error raised at the end lists every undeclared variable.
+        """
+        for node in nodes:
+            self.dispatch(node)
+            if not self.errors:
+                yield node
+        self.check()
+
+    def check(self) -> None:
+        if self.errors:
+            t = ', '.join(f'{x.id} [{x.token.line}:{x.token.col}]' for x in self.errors)
+            raise UWUError(f"Undeclared variables: {t}.")
+
+    def visit_root(self, root: TreeRoot) -> None:
+        for child in root.children:
+            self.dispatch(child)
+
+    def resolve_arguments(self, args: list) -> None:
+        # Arguments are leaves, resolve them without dispatching.
+        slots = self.symbols.slots
+        types = self.symbols.types
+        for x in args:
+            if type(x) is PLIndentifier:
+                slot = slots.get(x.id)
+                if slot is None:
+                    self.errors.append(x)
+                    continue
+                x._who = slot
+                x._type = types[slot]
+            elif type(x) is not PLNumber:
+                self.dispatch(x)
+
+    def visit_call(self, call: PLCall) -> None:
+        self.resolve_arguments(call.arguments)
+
+    def visit_stx(self, stx: PLStx) -> None:
+        self.resolve_arguments(stx.arguments)
+
+    def visit_decl(self, decl: PLDecl) -> None:
+        type = DECL_TYPES.get(decl.type)
+        if type is None:
+            raise RuntimeError(f"Declaration type not found {decl.type}.")
+        id = decl.variable
+        id._who = self.symbols.declare(id.id, type)
+        id._type = type
+
+    def visit_identifier(self, id: PLIndentifier) -> None:
+        slot = self.symbols.slots.get(id.id)
+        if slot is None:
+            self.errors.append(id)
+            return
+        id._who = slot
+        id._type = self.symbols.types[slot]
+
+    def visit_number(self, n: PLNumber) -> None:
+        pass
@@ -0,0 +1,357 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import stat
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from typing import Optional
+
+from tokenizer import Tokenizer
+from uwu_pipeline import compile_stream, compile_tree
+from uwu_optimize import Optimizer
+from uwu_backends import BACKENDS, get_backend
+from uwu_exception import UWUError
+from uwu_version import VERSION
+
+# Backends producing text, which fits in a JSON answer.
+TARGETS = ('python', 'python-fast-locals', 'c')
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+def parse_address(address: str) -> tuple:
+    """
+    ('tcp', host, port) for HOST:PORT or :PORT, which listens on
+    127.0.0.1, and ('unix', path) for anything else.
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return 'tcp', host or '127.0.0.1', int(port)
+    return 'unix', address
+
+def remove_stale_socket(path: str) -> None:
+    """
+    Remove the socket file at path if no server listens on it anymore.
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+
+def compile_source(source: str, target: str, opt: int = 0) -> str:
+    """
+    Compile UWU source to the code of target. Runs in the worker pool.
+    """
+    compiler_cls = get_backend(target)
+    o = io.StringIO()
+    tokenizer = Tokenizer.from_string(source, engine = 'bulk')
+    if opt:
+        compile_tree(tokenizer, compiler_cls, o, Optimizer(opt))
+    else:
+        compile_stream(tokenizer, compiler_cls, o)
+    return o.getvalue()
+
+class ResultCache:
+    """
+    In memory LRU of compile results keyed by a hash of the source and
+    the settings, holding at most max_bytes of output. Errors are kept
+    too, they only depend on the source.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def key(self, source: str, target: str, opt: int) -> str:
+        h = hashlib.sha256(f'{VERSION}\0{target}\0{opt}\0'.encode('utf-8'))
+        h.update(source.encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: tuple) -> None:
+        size = len(entry[1])
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1])
+        self._entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, text) = self._entries.popitem(last = False)
+            self.size -= len(text)
+
+class CompileServer:
+    """
+    Compiles UWU sources sent over a Unix socket or a TCP port.
+
+    Every request is one line of JSON, {"source": ..., "target": ...}
+    with optional "opt" and "id", answered by one line holding "id",
+    "ok" and either "output" or "error". Requests on one connection are
+    handled concurrently, so answers may come out of order. Compiling
+    happens in a pool of jobs processes, replaced when one of them dies;
+    results are cached in memory and identical requests in flight share
+    one compile.
+    """
+    def __init__(self, jobs: Optional[int] = None, cache_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.jobs = jobs
+        self.cache = ResultCache(cache_bytes)
+        self.pool = None
+        self._pending = {}
+        self.requests = 0
+        self.hits = 0
+        self.restarts = 0
+
+    async def start(self, address: str):
+        """
+        Start listening on address, see parse_address. Returns the
+        asyncio server.
+        """
+        if self.pool is None:
+            self.pool = self.new_pool()
+        kind, *where = parse_address(address)
+        if kind == 'tcp':
+            host, port = where
+            return await asyncio.start_server(self.handle, host, port, limit = MAX_REQUEST_BYTES)
+        remove_stale_socket(where[0])
+        return await asyncio.start_unix_server(self.handle, where[0], limit = MAX_REQUEST_BYTES)
+
+    def new_pool(self) -> ProcessPoolExecutor:
+        # Forked workers would inherit the sockets of the clients
+        # connected at that time and keep them open.
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload([__name__, *sorted({BACKENDS[t][0] for t in TARGETS})])
+        else:
+            context = multiprocessing.get_context('spawn')
+        return ProcessPoolExecutor(max_workers = self.jobs, mp_context = context)
+
+    def replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Start a new pool in place of broken, a pool whose worker died.
+        Requests that saw the same pool break only replace it once.
+        """
+        if self.pool is not broken:
+            return
+        broken.shutdown(wait = False, cancel_futures = True)
+        self.pool = self.new_pool()
+        self.restarts += 1
+
+    async def serve(self, address: str) -> None:
+        server = await self.start(address)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures = True)
+            self.pool = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_REQUEST_BYTES, the stream cannot be
+                    # read any further.
+                    await self.send(writer, lock, {'id': None, 'ok': False, 'error': "Request too large."})
+                    break
+                if not line:
+                    break
+                task = asyncio.create_task(self.answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def answer(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        id = None
+        try:
+            request = json.loads(line)
+            id = request.get('id')
+            source = request['source']
+            target = request.get('target', 'python')
+            opt = request.get('opt', 0)
+            if target not in TARGETS:
+                raise UWUError(f"Unknown target. {target}")
+            if opt not in Optimizer.LEVELS:
+                raise UWUError(f"Unknown optimization level. {opt}")
+            ok, text = await self.compile(source, target, opt)
+        except (ValueError, KeyError, TypeError, AttributeError, UWUError) as e:
+            ok, text = False, f"Bad request. {type(e).__name__}: {e}"
+        except BrokenExecutor as e:
+            ok, text = False, f"Server error. {type(e).__name__}: {e}"
+        response = {'id': id, 'ok': ok}
+        response['output' if ok else 'error'] = text
+        await self.send(writer, lock, response)
+
+    async def send(self, writer: asyncio.StreamWriter, lock: asyncio.Lock, response: dict) -> None:
+        async with lock:
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def compile(self, source: str, target: str, opt: int) -> tuple:
+        """
+        (True, output) or (False, error message) for source.
+        """
+        self.requests += 1
+        key = self.cache.key(source, target, opt)
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        pool = self.pool
+        try:
+            try:
+                output = await asyncio.get_running_loop().run_in_executor(pool, compile_source, source, target, opt)
+                entry = (True, output)
+            except BrokenExecutor as e:
+                # A worker died, the request fails but later ones go to
+                # a new pool.
+                self.replace_pool(pool)
+                future.set_exception(e)
+                future.exception()
+                raise
+            except Exception as e:
+                entry = (False, f"{type(e).__name__}: {e}")
+            self.cache.put(key, entry)
+            future.set_result(entry)
+        finally:
+            del self._pending[key]
+            if not future.done():
+                future.cancel()
+        return entry
+
+def _encode(source: str, target: str, opt: int, id = None) -> bytes:
+    return json.dumps({'id': id, 'source': source, 'target': target, 'opt': opt}).encode('utf-8') + b'\n'
+
+def _result(response: dict) -> str:
+    if not response['ok']:
+        raise UWUError(response['error'])
+    return response['output']
+
+class Client:
+    """
+    Blocking client of CompileServer, sending one request at a time.
+
+        with Client('/tmp/uwu.sock') as client:
+            code = client.compile(source, 'c')
+
+    Errors of the compiler are raised as UWUError.
+    """
+    def __init__(self, address: str, timeout: Optional[float] = None) -> None:
+        kind, *where = parse_address(address)
+        if kind == 'tcp':
+            self.sock = socket.create_connection(tuple(where), timeout = timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(where[0])
+        self.file = self.sock.makefile('rb')
+
+    def compile(self, source: str, target: str = 'python', opt: int = 0) -> str:
+        self.sock.sendall(_encode(source, target, opt))
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return _result(json.loads(line))
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class AsyncClient:
+    """
+    asyncio client of CompileServer. Requests may be sent concurrently
+    over one connection, answers are matched by id.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._task = asyncio.create_task(self._read())
+
+    @classmethod
+    async def connect(cls, address: str) -> 'AsyncClient':
+        kind, *where = parse_address(address)
+        if kind == 'tcp':
+            reader, writer = await asyncio.open_connection(*where, limit = MAX_REQUEST_BYTES)
+        else:
+            reader, writer = await asyncio.open_unix_connection(where[0], limit = MAX_REQUEST_BYTES)
+        return cls(reader, writer)
+
+    async def _read(self) -> None:
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Server closed the connection."))
+            self._waiting.clear()
+
+    async def compile(self, source: str, target: str = 'python', opt: int = 0) -> str:
+        id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[id] = future
+        self.writer.write(_encode(source, target, opt, id))
+        await self.writer.drain()
+        return _result(await future)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,50 @@
+import codecs
+import io
+import mmap
+
+from collections.abc import Iterable, Iterator
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+def read_blocks(f, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    while True:
+        b = f.read(chunk_size)
+        if not b:
+            return
+        yield b
+
+def mmap_blocks(f, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    try:
+        m = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped.
+        return
+    with m:
+        for i in range(0, len(m), chunk_size):
+            yield m[i:i + chunk_size]
+
+def decode_blocks(blocks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Decode UTF-8 blocks one at a time, translating newlines like a file
+    opened in text mode. Multi byte characters and '\\r\\n' pairs split
+    across blocks are handled by the incremental decoder; pure ASCII
+    blocks skip it.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate = True)
+    for b in blocks:
+        if b.isascii() and b'\r' not in b and decoder.getstate() == (b'', 0):
+            yield b.decode('ascii')
+        else:
+            yield decoder.decode(b)
+    tail = decoder.decode(b'', final = True)
+    if tail:
+        yield tail
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False) -> Iterator[str]:
+    """
+    Yield the text of path in chunks of at most chunk_size characters,
+    so the whole file is never held in memory.
+    """
+    with open(path, 'rb') as f:
+        blocks = mmap_blocks(f, chunk_size) if use_mmap else read_blocks(f, chunk_size)
+        yield from decode_blocks(blocks)
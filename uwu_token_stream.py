@@ -0,0 +1,133 @@
+from array import array
+from typing import Optional, Any
+
+from tokenizer import Token, TokenType, Tokenizer
+
+class TokenStream:
+    """
+    Struct of arrays holding every token of one source.
+
+    Kinds, positions and spans live in parallel arrays, values are
+    interned in a table and the source metadata is held once for the
+    whole stream. Token objects are only built by token().
+    """
+    source_name: Optional[str]
+    source_path: Optional[str]
+
+    def __init__(self, source_name: Optional[str] = None, source_path: Optional[str] = None) -> None:
+        self.source_name = source_name
+        self.source_path = source_path
+
+        self.kinds = array('b')
+        self.lines = array('i')
+        self.cols = array('i')
+        self.offsets = array('q')
+        self.spans = array('i')
+        self.values = array('i')
+
+        self._value_table = []
+        self._value_index = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def intern(self, value: Any) -> int:
+        if value is None:
+            return -1
+        # 2 and 2.0 hash the same, so the type is part of the key.
+        key = (type(value), value)
+        i = self._value_index.get(key)
+        if i is None:
+            i = len(self._value_table)
+            self._value_table.append(value)
+            self._value_index[key] = i
+        return i
+
+    def append(self, type: TokenType, value: Any, line: int, col: int, n: int, span: int) -> None:
+        self.kinds.append(type.value)
+        self.values.append(self.intern(value))
+        self.lines.append(line)
+        self.cols.append(col)
+        self.offsets.append(n)
+        self.spans.append(span)
+
+    def shift(self, lines: int, chars: int) -> None:
+        """
+        Move every token by lines and chars, after text in front of the
+        stream grew or shrank.
+        """
+        if lines:
+            self.lines = array('i', [x + lines for x in self.lines])
+        if chars:
+            self.offsets = array('q', [x + chars for x in self.offsets])
+
+    def kind(self, i: int) -> TokenType:
+        return TokenType(self.kinds[i])
+
+    def value(self, i: int) -> Any:
+        v = self.values[i]
+        if v < 0:
+            return None
+        return self._value_table[v]
+
+    def token(self, i: int) -> Token:
+        return Token(
+            type = self.kind(i), value = self.value(i),
+            source_name = self.source_name, source_path = self.source_path,
+            line = self.lines[i], col = self.cols[i], n = self.offsets[i], span = self.spans[i]
+            )
+
+    def ref(self, i: int) -> 'TokenRef':
+        return TokenRef(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.token(i)
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer: Tokenizer) -> 'TokenStream':
+        """
+        Drain tokenizer into a new stream, EOF included. Tokenizers with
+        a scan() method are read without building Token objects.
+        """
+        stream = cls(source_name = tokenizer.source_name, source_path = tokenizer.source_path)
+        scan = getattr(tokenizer, 'scan', None)
+        if scan is not None:
+            for t in scan():
+                stream.append(*t)
+            t = tokenizer.eof_token()
+            stream.append(t.type, t.value, t.line, t.col, t.n, t.span)
+            return stream
+
+        for t in tokenizer:
+            stream.append(t.type, t.value, t.line, t.col, t.n, t.span)
+        return stream
+
+class TokenRef:
+    """
+    Handle to a token inside a TokenStream. The Token is built when
+    one of its fields is read, usually for an error message.
+    """
+    __slots__ = ('stream', 'index')
+
+    def __init__(self, stream: TokenStream, index: int) -> None:
+        self.stream = stream
+        self.index = index
+
+    def resolve(self) -> Token:
+        return self.stream.token(self.index)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in self.__slots__:
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TokenRef):
+            other = other.resolve()
+        return self.resolve() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(self.resolve())
@@ -0,0 +1,105 @@
+import math
+
+from typing import Union
+
+from uwu_parser import TreeRoot, PLIndentifier, PLNumber
+from uwu_pass import PLCall, PLDecl, PLStx
+from uwu_visitor import Visitor
+from uwu_resolve import TYPE_INT, TYPE_LONG, TYPE_DOUBLE
+
+INT_MAX = 2 ** 31 - 1
+LONG_MAX = 2 ** 63 - 1
+
+def bound_type(bound: Union[int, float]) -> int:
+    """
+    Narrowest type holding every integer up to bound in magnitude.
+    Integers too large for a long fall back to a double.
+    """
+    if bound <= INT_MAX:
+        return TYPE_INT
+    if bound <= LONG_MAX:
+        return TYPE_LONG
+    return TYPE_DOUBLE
+
+def literal_type(value: Union[int, float]) -> int:
+    if isinstance(value, float):
+        return TYPE_DOUBLE
+    return bound_type(abs(value))
+
+class TypeInference(Visitor):
+    """
+    Sets _type on every variable use to the numeric type its value
+    needs at that point of the program, TYPE_INT, TYPE_LONG or
+    TYPE_DOUBLE, so a backend with fixed size variables can follow
+    Python's numbers.
+
+    A declared variable starts as an int holding 0. A SUM adding a
+    double makes it a double, and one that may take it out of the range
+    of its integer type widens it to a long, using a bound on its
+    magnitude. Types only widen until the variable is declared again.
+    The target of a SUM gets the type after the SUM.
+
+    Runs on resolved trees, it keeps its state by slot.
+    """
+    def __init__(self) -> None:
+        self.types = []
+        self.bounds = []
+
+    def infer(self, root: TreeRoot) -> None:
+        self.dispatch(root)
+
+    def infer_stream(self, nodes):
+        for node in nodes:
+            self.dispatch(node)
+            yield node
+
+    def visit_root(self, root: TreeRoot) -> None:
+        for child in root.children:
+            self.dispatch(child)
+
+    def visit_decl(self, decl: PLDecl) -> None:
+        slot = decl.variable._who
+        if slot >= len(self.types):
+            grow = slot + 1 - len(self.types)
+            self.types.extend([TYPE_INT] * grow)
+            self.bounds.extend([0] * grow)
+        self.types[slot] = TYPE_INT
+        self.bounds[slot] = 0
+        decl.variable._type = TYPE_INT
+
+    def operand(self, arg) -> tuple:
+        """
+        Type and magnitude bound of a SUM or call argument.
+        """
+        if isinstance(arg, PLIndentifier):
+            arg._type = self.types[arg._who]
+            return arg._type, self.bounds[arg._who]
+        if isinstance(arg, PLNumber):
+            return literal_type(arg.value), abs(arg.value)
+        raise RuntimeError(f"Unknown argument. {arg}")
+
+    def visit_call(self, call: PLCall) -> None:
+        for x in call.arguments:
+            self.operand(x)
+
+    def visit_stx(self, stx: PLStx) -> None:
+        if stx.name != 'SUM' or len(stx.arguments) != 2 or not isinstance(stx.arguments[0], PLIndentifier):
+            # Left for the backend to report.
+            return
+        iden, val = stx.arguments
+        type, bound = self.operand(val)
+        slot = iden._who
+        try:
+            bound += self.bounds[slot]
+        except OverflowError:
+            # A float and an int past any double, a double either way.
+            bound = math.inf
+        self.types[slot] = max(self.types[slot], type, bound_type(bound))
+        self.bounds[slot] = bound
+        iden._type = self.types[slot]
+
+    def visit_identifier(self, id: PLIndentifier) -> None:
+        pass
+
+    def visit_number(self, n: PLNumber) -> None:
+        pass
@@ -0,0 +1,3 @@
+# Part of every cache key. Bump it in any change to the code a backend
+# emits, or outputs cached by an older compiler are served unchanged.
+VERSION = '0.3.3'
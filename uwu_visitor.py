@@ -0,0 +1,49 @@
+NODE_TYPES = {}
+_VISITORS = []
+
+def node(method: str):
+    """
+    Class decorator registering a tree node type, handled by the visitor
+    method named method.
+    """
+    def wrap(cls):
+        NODE_TYPES[cls] = method
+        cls.visit = _visit
+        # Visitors created before this node type need it in their table.
+        for visitor_cls in _VISITORS:
+            visitor_cls.build_dispatch()
+        return cls
+    return wrap
+
+def _visit(self, visitor):
+    return visitor.dispatch(self)
+
+class Visitor:
+    """
+    Base of every tree walker. A dispatch table from node type to visit
+    method is built once per class, when the class is created, so
+    visiting a node is a single dict lookup. Node types the class has
+    no method for map to unknown_node.
+    """
+    _dispatch = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.build_dispatch()
+        _VISITORS.append(cls)
+
+    @classmethod
+    def build_dispatch(cls) -> None:
+        cls._dispatch = {
+            node_cls: getattr(cls, method, cls.unknown_node)
+            for node_cls, method in NODE_TYPES.items()
+        }
+
+    def dispatch(self, node):
+        f = self._dispatch.get(type(node))
+        if f is None:
+            return self.unknown_node(node)
+        return f(self, node)
+
+    def unknown_node(self, node):
+        raise RuntimeError(f"Unknown syntax tree node. {node}")
@@ -0,0 +1,157 @@
+import sys
+
+from array import array
+from dataclasses import dataclass, field
+
+from tokenizer import Tokenizer
+from uwu_parser import Parser, TreeRoot, PLNumber, PLIndentifier
+from uwu_pass import Pass, PLCall, PLDecl, PLStx
+from uwu_visitor import Visitor
+from uwu_instrument import Timings, NULL_TIMINGS
+from uwu_resolve import Resolver, Symbols
+
+OP_DECL = 0
+OP_SUM_CONST = 1
+OP_SUM_SLOT = 2
+OP_PRINT = 3
+
+@dataclass
+class Program:
+    """
+    Bytecode for the VM. code is a flat array of opcodes followed by
+    their operands:
+
+    OP_DECL slot const        slots[slot] = consts[const]
+    OP_SUM_CONST slot const   slots[slot] += consts[const]
+    OP_SUM_SLOT slot other    slots[slot] += slots[other]
+    OP_PRINT argc args...     print the arguments, a slot when >= 0,
+                              consts[-arg - 1] otherwise
+    """
+    code: array = field(default_factory = lambda: array('l'))
+    consts: list = field(default_factory = list)
+    names: list = field(default_factory = list)
+
+class BytecodeCompiler(Visitor):
+    def __init__(self, t = None) -> None:
+        self.t = t
+        self.symbols = Symbols()
+        self.program = Program(names = self.symbols.names)
+        self._consts = {}
+
+    def compile(self) -> Program:
+        Resolver(self.symbols).resolve(self.t)
+        self.dispatch(self.t)
+        return self.program
+
+    def compile_stream(self, nodes) -> Program:
+        for node in Resolver(self.symbols).resolve_stream(nodes):
+            self.dispatch(node)
+        return self.program
+
+    def emit(self, *t) -> None:
+        self.program.code.extend(t)
+
+    def const(self, value) -> int:
+        key = (type(value), value)
+        i = self._consts.get(key)
+        if i is None:
+            i = len(self.program.consts)
+            self.program.consts.append(value)
+            self._consts[key] = i
+        return i
+
+    def slot(self, id: PLIndentifier) -> int:
+        return id._who
+
+    def operand(self, arg) -> int:
+        if isinstance(arg, PLIndentifier):
+            return self.slot(arg)
+        if isinstance(arg, PLNumber):
+            return -self.const(arg.value) - 1
+        raise RuntimeError(f"Unknown argument. {arg}")
+
+    def visit_root(self, root: TreeRoot) -> None:
+        for child in root.children:
+            self.dispatch(child)
+
+    CALL_NAMES = {
+        'UwU': OP_PRINT,
+    }
+
+    def visit_call(self, call: PLCall) -> None:
+        callee = call.callee
+        if not isinstance(callee, PLIndentifier):
+            raise RuntimeError(f"VM does not support callees that are not built-in.")
+        op = self.CALL_NAMES.get(callee.id)
+        if op is None:
+            raise RuntimeError(f"Callable name not found. {callee.id}")
+        self.emit(op, len(call.arguments), *[self.operand(x) for x in call.arguments])
+
+    DECL_INITIALIZER = {
+        'INT': 0,
+    }
+
+    def visit_decl(self, decl: PLDecl) -> None:
+        initializer = self.DECL_INITIALIZER.get(decl.type)
+        if initializer is None:
+            raise RuntimeError(f"Declaration initializer not found {decl.type}.")
+        self.emit(OP_DECL, self.slot(decl.variable), self.const(initializer))
+
+    def visit_stx(self, stx: PLStx) -> None:
+        name = stx.name
+
+        if name == 'SUM':
+            if len(stx.arguments) != 2:
+                raise RuntimeError(f"Expected 2 parameters in SUM syntax. An identifier and a value.")
+            iden, val = stx.arguments
+            if not isinstance(iden, PLIndentifier):
+                raise RuntimeError(f"Expected identifier as first parameter in SUM syntax.")
+            if isinstance(val, PLIndentifier):
+                self.emit(OP_SUM_SLOT, self.slot(iden), self.slot(val))
+            else:
+                self.emit(OP_SUM_CONST, self.slot(iden), -self.operand(val) - 1)
+            return
+
+        raise RuntimeError(f"Unknown syntax name. {name}")
+
+def run(program: Program, out = None) -> list:
+    """
+    Run program, printing to out (sys.stdout by default). Returns the
+    final value of every slot.
+    """
+    if out is None:
+        out = sys.stdout
+    code = program.code
+    consts = program.consts
+    slots = [None] * len(program.names)
+    n = len(code)
+    pc = 0
+    while pc < n:
+        op = code[pc]
+        if op == OP_SUM_CONST:
+            slots[code[pc + 1]] += consts[code[pc + 2]]
+            pc += 3
+        elif op == OP_PRINT:
+            argc = code[pc + 1]
+            args = [slots[x] if x >= 0 else consts[-x - 1] for x in code[pc + 2:pc + 2 + argc]]
+            print(*args, file = out)
+            pc += 2 + argc
+        elif op == OP_SUM_SLOT:
+            slots[code[pc + 1]] += slots[code[pc + 2]]
+            pc += 3
+        elif op == OP_DECL:
+            slots[code[pc + 1]] = consts[code[pc + 2]]
+            pc += 3
+        else:
+            raise RuntimeError(f"Unknown opcode {op} at {pc}.")
+    return slots
+
+def load(tokenizer: Tokenizer, timings: Timings = NULL_TIMINGS) -> Program:
+    """
+    Compile the program read by tokenizer to bytecode, one statement at
+    a time.
+    """
+    parser = Parser(timings.tokenizer(tokenizer))
+    nodes = timings.lowered(Pass(consume = True).lower(timings.statements(parser.statements())))
+    with timings.stage('backend'):
+        return BytecodeCompiler().compile_stream(nodes)
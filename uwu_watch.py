@@ -0,0 +1,163 @@
+import contextlib
+import os
+import sys
+import time
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from uwu_source import read_chunks
+from uwu_incremental import IncrementalCompiler
+
+@dataclass
+class WatchedFile:
+    stamp: tuple
+    lines: Optional[list] = None
+    compiler: Optional[IncrementalCompiler] = None
+
+def changed_lines(old: list, new: list) -> Optional[tuple]:
+    """
+    (start, old end, new end) of the lines that differ between old and
+    new, None if they are equal. At least one new line is always part
+    of the range, so it can be given to IncrementalCompiler.edit.
+    """
+    if old == new:
+        return None
+    size = min(len(old), len(new))
+    start = 0
+    while start < size and old[start] == new[start]:
+        start += 1
+    suffix = 0
+    while suffix < size - start and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    if new_end == start:
+        # Only deletions, replace a neighbouring line as well.
+        if start > 0:
+            start -= 1
+        else:
+            old_end += 1
+            new_end += 1
+    return start, old_end, new_end
+
+class Watcher:
+    """
+    Keeps a set of .uwu files compiled, polling their mtime and size.
+
+    sources returns the paths to watch, it is called on every poll so
+    new files in watched directories are picked up. Files are compiled
+    with an IncrementalCompiler kept in memory per file, so a save only
+    tokenizes, parses and lowers the lines it changed, and errors of a
+    save are turned into a message by describe(path, error). Files that
+    cannot be compiled that way, and files whose first build failed, go
+    through full(path), which compiles the file and returns an error
+    message or None.
+    """
+    def __init__(self, sources: Callable[[], list], compiler_cls, full: Callable[[str], Optional[str]], engine: str = 'bulk', incremental: bool = True, describe: Optional[Callable[[str, Exception], str]] = None) -> None:
+        self.sources = sources
+        self.compiler_cls = compiler_cls
+        self.full = full
+        self.describe = describe or (lambda path, e: f"{path}: {type(e).__name__}: {e}")
+        self.engine = engine
+        self.incremental = incremental and not getattr(compiler_cls, 'BINARY', False)
+        self.files = {}
+
+    def scan(self) -> list:
+        """
+        Paths that are new or changed since the last scan. Files that
+        went away are forgotten.
+        """
+        changed = []
+        seen = set()
+        for path in self.sources():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            f = self.files.get(path)
+            if f is None:
+                self.files[path] = WatchedFile(stamp)
+                changed.append(path)
+            elif f.stamp != stamp:
+                f.stamp = stamp
+                changed.append(path)
+        for path in self.files.keys() - seen:
+            del self.files[path]
+        return changed
+
+    def build(self, path: str) -> Optional[str]:
+        """
+        Compile path next to it, returning an error message or None.
+        """
+        f = self.files[path]
+        if not self.incremental:
+            return self.full(path)
+        no_ext, _ = os.path.splitext(path)
+        target = no_ext + self.compiler_cls.EXT
+        if f.compiler is None:
+            try:
+                lines = ''.join(read_chunks(path)).split('\n')
+                compiler = IncrementalCompiler(self.compiler_cls, '\n'.join(lines), source_name = os.path.basename(path), source_path = path, engine = self.engine)
+                output = compiler.output()
+            except Exception:
+                # Report the error of a full build, and try again from
+                # scratch on the next change.
+                return self.full(path)
+            f.compiler, f.lines = compiler, lines
+        else:
+            lines = f.lines
+            try:
+                lines = ''.join(read_chunks(path)).split('\n')
+                span = changed_lines(f.lines, lines)
+                if span is None:
+                    return None
+                start, old_end, new_end = span
+                output = f.compiler.edit(start, old_end, '\n'.join(lines[start:new_end]))
+            except Exception as e:
+                # Edits that do not parse are not applied, later errors
+                # leave the new lines in place.
+                if f.compiler.source == '\n'.join(lines):
+                    f.lines = lines
+                # Like a full build, do not leave stale output behind.
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(target)
+                return self.describe(path, e)
+            f.lines = lines
+
+        with open(target, 'w', encoding = 'utf-8') as o:
+            o.write(output)
+        return None
+
+    def poll(self) -> list:
+        """
+        Rebuild the changed files. Returns (path, error, seconds) for
+        every one of them.
+        """
+        results = []
+        for path in self.scan():
+            start = time.perf_counter()
+            error = self.build(path)
+            results.append((path, error, time.perf_counter() - start))
+        return results
+
+    def run(self, interval: float = 0.25, out = sys.stderr) -> None:
+        """
+        Poll every interval seconds until interrupted, reporting every
+        rebuild and its latency to out.
+        """
+        try:
+            while True:
+                start = time.perf_counter()
+                results = self.poll()
+                if results:
+                    for path, error, seconds in results:
+                        print(error if error is not None else f"{path}: {seconds * 1000:.1f} ms", file = out)
+                    n = len(results)
+                    print(f"rebuilt {n} {'file' if n == 1 else 'files'} in {(time.perf_counter() - start) * 1000:.1f} ms", file = out)
+                    out.flush()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass